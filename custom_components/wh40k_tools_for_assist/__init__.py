@@ -1,13 +1,30 @@
 """WH40k Tools for Assist integration."""
 
 import logging
+from datetime import datetime, timedelta
+from pathlib import Path
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import STORAGE_DIR
 
-from .const import ADDON_NAME, DOMAIN
+from .cache import SQLiteCache
+from .const import (
+    ADDON_NAME,
+    CACHE_DB_FILENAME,
+    CONF_CACHE_MAX_SIZE,
+    CONF_CACHE_NEGATIVE_TTL,
+    CONF_CACHE_STALE_TTL,
+    CONF_CACHE_STALE_WHILE_REVALIDATE,
+    CONF_CACHE_SWEEP_INTERVAL,
+    DOMAIN,
+    SERVICE_DEFAULTS,
+)
 from .llm_functions import cleanup_llm_functions, setup_llm_functions
+from .services import async_import_startup_snapshot, async_setup_services
 
 __all__ = ["DOMAIN"]
 
@@ -15,18 +32,104 @@ _LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+PLATFORMS = [Platform.SENSOR]
+
+
+def _remove_legacy_cache() -> None:
+    """Delete the cache database earlier versions kept beside the integration."""
+    (Path(__file__).parent / CACHE_DB_FILENAME).unlink(missing_ok=True)
+
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the WH40k Tools for Assist integration."""
     hass.data.setdefault(DOMAIN, {})
     _LOGGER.info("Setting up %s integration", ADDON_NAME)
+    async_setup_services(hass)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up WH40k Tools for Assist from a config entry."""
     _LOGGER.info("Setting up %s for entry: %s", ADDON_NAME, entry.entry_id)
+    config_data = {**entry.data, **entry.options}
+    stale_ttl = 0
+    if config_data.get(
+        CONF_CACHE_STALE_WHILE_REVALIDATE,
+        SERVICE_DEFAULTS[CONF_CACHE_STALE_WHILE_REVALIDATE],
+    ):
+        stale_ttl = 60 * config_data.get(
+            CONF_CACHE_STALE_TTL, SERVICE_DEFAULTS[CONF_CACHE_STALE_TTL]
+        )
+    negative_ttl = 60 * config_data.get(
+        CONF_CACHE_NEGATIVE_TTL, SERVICE_DEFAULTS[CONF_CACHE_NEGATIVE_TTL]
+    )
+    max_bytes = (
+        config_data.get(CONF_CACHE_MAX_SIZE, SERVICE_DEFAULTS[CONF_CACHE_MAX_SIZE])
+        * 1024
+        * 1024
+    )
+
+    await hass.async_add_executor_job(_remove_legacy_cache)
+    cache = SQLiteCache()
+    cache.configure(
+        Path(hass.config.path(STORAGE_DIR, DOMAIN, CACHE_DB_FILENAME)),
+        stale_ttl=stale_ttl,
+        negative_ttl=negative_ttl,
+        max_bytes=max_bytes,
+    )
+
+    async def _async_flush_cache(_: datetime) -> None:
+        """Write queued cache entries to the database."""
+        try:
+            await cache.async_flush()
+        except Exception:
+            _LOGGER.exception("Failed to write queued cache entries")
+
+    async def _async_shutdown_cache(_: Event) -> None:
+        """Write queued cache entries and stop the cache worker thread."""
+        try:
+            await cache.async_shutdown()
+        except Exception:
+            _LOGGER.exception("Failed to shut down the cache")
+
+    async def _async_sweep_cache(now: datetime) -> None:
+        """Delete expired cache entries in the background."""
+        try:
+            await cache.async_sweep()
+        except Exception:
+            _LOGGER.exception("Failed to sweep expired cache entries")
+
+    entry.async_create_background_task(
+        hass, async_import_startup_snapshot(hass), f"{DOMAIN} cache import"
+    )
+
+    # Home Assistant does not unload entries on shutdown
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown_cache)
+    )
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            _async_flush_cache,
+            timedelta(seconds=SQLiteCache.FLUSH_INTERVAL),
+            name=f"{DOMAIN} cache flush",
+        )
+    )
+
+    sweep_interval = config_data.get(
+        CONF_CACHE_SWEEP_INTERVAL, SERVICE_DEFAULTS[CONF_CACHE_SWEEP_INTERVAL]
+    )
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            _async_sweep_cache,
+            timedelta(minutes=sweep_interval),
+            name=f"{DOMAIN} cache sweep",
+        )
+    )
+
     await setup_llm_functions(hass, entry.data)
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     _LOGGER.info("%s functions successfully set up", ADDON_NAME)
     return True
 
@@ -34,6 +137,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     _LOGGER.info("Unloading %s for entry: %s", ADDON_NAME, entry.entry_id)
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     await cleanup_llm_functions(hass)
+    await SQLiteCache().async_close()
     _LOGGER.info("%s functions successfully unloaded", ADDON_NAME)
-    return True
+    return unload_ok
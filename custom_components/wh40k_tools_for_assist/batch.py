@@ -0,0 +1,28 @@
+"""Batches of queries answered in a single tool call."""
+
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.util.json import JsonObjectType
+
+# Most queries looked up by one call, keeping a batch within the deadline
+MAX_QUERIES = 5
+
+QUERIES_PARAMETER = vol.Optional(
+    "queries",
+    description="Further subjects to look up in the same call, for example to "
+    f"compare several of them (at most {MAX_QUERIES} queries in total)",
+)
+
+
+def get_queries(tool_args: dict[str, Any]) -> list[str]:
+    """Return the distinct queries of a tool call, the main query first."""
+    queries = [tool_args["query"], *tool_args.get("queries", [])]
+    return list(dict.fromkeys(queries))[:MAX_QUERIES]
+
+
+def batch_response(queries: list[str], responses: list[dict]) -> JsonObjectType:
+    """Return the response to a single query as is, or those of a batch by query."""
+    if len(queries) == 1:
+        return responses[0]
+    return {"results": dict(zip(queries, responses, strict=True))}
@@ -0,0 +1,72 @@
+"""Circuit breaker for the upstream of a WH40k tools cache source."""
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class CircuitBreaker:
+    """
+    Fail fast while the upstream of one cache source keeps failing.
+
+    ``threshold`` consecutive failures open the breaker. Once ``cooldown``
+    seconds have passed it is half open and lets a single trial fetch
+    through, whose outcome closes the breaker or opens it again.
+    """
+
+    threshold: int
+    cooldown: float
+    failures: int = 0
+    trips: int = 0
+    opened_at: float | None = None
+    probing: bool = False
+
+    @property
+    def state(self) -> str:
+        """Return closed, open or half_open."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() < self.opened_at + self.cooldown:
+            return "open"
+        return "half_open"
+
+    @property
+    def retry_in(self) -> int:
+        """Return the seconds until the next trial fetch is allowed."""
+        if self.opened_at is None:
+            return 0
+        return max(0, int(self.opened_at + self.cooldown - time.monotonic()))
+
+    def allow(self) -> bool:
+        """Return whether a fetch may be sent to the upstream."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.probing:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful fetch."""
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        """Count a failed fetch, opening the breaker at the threshold."""
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the breaker state as a dictionary."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": self.retry_in,
+        }
@@ -0,0 +1,28 @@
+"""Response size budgets keeping tool results small for the conversation agent."""
+
+ELLIPSIS = "…"
+
+
+def share_budget(max_chars: int, count: int) -> int:
+    """Split a per call character budget evenly between ``count`` results."""
+    return max(1, max_chars // max(1, count))
+
+
+def trim_text(text: str, max_chars: int) -> str:
+    """
+    Shorten text to at most ``max_chars`` characters.
+
+    Cuts at the last sentence end, or failing that the last word boundary, in
+    the allowed length and marks the cut with an ellipsis.
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - len(ELLIPSIS)]
+    sentence_end = cut.rfind(". ")
+    if sentence_end >= len(cut) // 2:
+        return cut[: sentence_end + 1]
+    word_end = cut.rfind(" ")
+    # Drop the partial word unless the cut already falls between words
+    if word_end > 0 and not text[len(cut)].isspace():
+        cut = cut[:word_end]
+    return cut.rstrip(" ,;:") + ELLIPSIS
@@ -1,49 +1,375 @@
 """SQLite cache module for WH40k tools."""
 
+import asyncio
+import base64
+import gzip
 import hashlib
 import json
 import logging
 import sqlite3
 import time
+import zlib
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Self
+from typing import TYPE_CHECKING, Any, Self
+
+import aiohttp
+from homeassistant.core import callback
+
+from . import codec
+from .breaker import CircuitBreaker
+from .errors import FetchError, NotFoundError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from homeassistant.core import HomeAssistant
 
 logger = logging.getLogger(__name__)
 
+# Bump SCHEMA_VERSION whenever the cache table layout changes. A database at
+# any other version is dropped and recreated, losing only cached responses.
+SCHEMA_VERSION = 1
+SNAPSHOT_VERSION = 1
+
+SCHEMA_CREATE_STATEMENTS = (
+    """
+    CREATE TABLE cache (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT NOT NULL UNIQUE,
+        created_at INTEGER NOT NULL,
+        expires_at INTEGER NOT NULL,
+        negative INTEGER NOT NULL DEFAULT 0,
+        codec TEXT NOT NULL DEFAULT 'json',
+        size INTEGER NOT NULL DEFAULT 0,
+        accessed_at INTEGER NOT NULL DEFAULT 0,
+        source TEXT NOT NULL DEFAULT '',
+        label TEXT NOT NULL DEFAULT '',
+        data BLOB NOT NULL
+    )
+    """,
+    "CREATE INDEX idx_cache_expires_at ON cache (expires_at)",
+    "CREATE INDEX idx_cache_accessed_at ON cache (accessed_at)",
+    "CREATE INDEX idx_cache_source_label ON cache (source, label)",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CachedFailure:
+    """
+    Negative cache entry recording a failed or empty upstream lookup.
+
+    Stored in rows flagged ``negative`` so it is never mistaken for a real
+    tool response; ``async_get_or_fetch()`` re-raises it as the original
+    exception type.
+    """
+
+    message: str
+    not_found: bool = False
+
+    def to_exception(self) -> FetchError:
+        """Return the exception this failure was recorded from."""
+        if self.not_found:
+            return NotFoundError(self.message)
+        return FetchError(self.message)
+
+
+@dataclass(slots=True)
+class CacheTierStats:
+    """Hit and miss counters for a single cache tier."""
+
+    hits: int = 0
+    misses: int = 0
+
+
+@dataclass(slots=True)
+class SourceStats:
+    """
+    Counters for the entries of one cache source.
+
+    Counters start from zero when Home Assistant starts. ``entries`` and
+    ``size_bytes`` describe the database and are refreshed by each sweep.
+    """
+
+    hits: int = 0
+    stale_hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    revalidated: int = 0  # stale entries the upstream reported unchanged
+    evictions: int = 0
+    expired: int = 0
+    entries: int = 0
+    size_bytes: int = 0
+    hit_time: float = 0.0  # seconds spent answering hits
+
+    @property
+    def hit_latency(self) -> float | None:
+        """Return the mean time taken to answer a hit in milliseconds."""
+        if not self.hits:
+            return None
+        return round(1000 * self.hit_time / self.hits, 3)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the counters as a dictionary."""
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "entries": self.entries,
+            "size_bytes": self.size_bytes,
+            "hit_latency_ms": self.hit_latency,
+        }
+
+
+class MemoryCache:
+    """
+    Bounded in-process LRU tier holding already decoded cache values.
+
+    Entries are limited both by count and by their approximate encoded size in
+    bytes; the least recently used entries are evicted first. Only used from
+    the event loop, so no locking is required. Cached values are shared with
+    callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """Initialize an empty memory tier."""
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = CacheTierStats()
+        self._entries: OrderedDict[str, tuple[Any, int, int, int]] = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        """Return the number of entries held in memory."""
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Return the approximate number of bytes held in memory."""
+        return self._bytes
+
+    def get(self, key: str, cutoff: int) -> Any | None:
+        """Return the unexpired value for key if created at or after cutoff."""
+        entry = self.get_entry(key, cutoff)
+        return None if entry is None else entry[0]
+
+    def get_entry(self, key: str, cutoff: int) -> tuple[Any, int] | None:
+        """Return the value and created_at for key if still acceptable."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+
+        data, created_at, expires_at, _ = entry
+        if expires_at <= time.time():
+            self.discard(key)
+            self.stats.misses += 1
+            return None
+        if created_at < cutoff:
+            self.stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return data, created_at
+
+    def put(
+        self, key: str, data: Any, created_at: int, expires_at: int, size: int
+    ) -> None:
+        """Store a decoded value, evicting least recently used entries."""
+        self.discard(key)
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (data, created_at, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def touch(self, key: str, created_at: int, expires_at: int) -> None:
+        """Renew the age of a value held in memory."""
+        if (entry := self._entries.get(key)) is not None:
+            self._entries[key] = (entry[0], created_at, expires_at, entry[3])
+
+    def discard(self, key: str) -> None:
+        """Remove key from memory if present."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+
+    def clear(self) -> None:
+        """Remove all entries from memory."""
+        self._entries.clear()
+        self._bytes = 0
+
 
 class SQLiteCache:
-    """SQLite-based cache for storing tool responses."""
+    """
+    SQLite-based cache for storing tool responses.
+
+    Coroutines must use the ``async_*`` methods; the synchronous ones block and
+    are only safe on the cache worker thread.
+    """
 
     _instance: "SQLiteCache | None" = None
-    DEFAULT_MAX_AGE = 7200  # 2 hour
+    DEFAULT_MAX_AGE = 7200  # 2 hour, TTL used when a writer does not set one
+    MEMORY_MAX_ENTRIES = 256
+    MEMORY_MAX_BYTES = 16 * 1024 * 1024  # 16 MiB
+    EVICT_TARGET_RATIO = 0.9
+    # Queued writes are flushed in one transaction at this interval, once a
+    # batch is pending and on close
+    FLUSH_INTERVAL = 10  # seconds
+    WRITE_BATCH_SIZE = 64
+    BREAKER_THRESHOLD = 5  # consecutive failures
+    BREAKER_COOLDOWN = 60  # seconds
+    REVALIDATE_TTL = 7 * 86400  # 1 week, kept past the TTL for revalidation
 
     def __new__(cls) -> Self:
         """Create or return singleton instance."""
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance.init_db()
+            cls._instance.init_worker()
         return cls._instance
 
+    def init_worker(self) -> None:
+        """Create the worker thread that owns the database connection."""
+        # All database access happens on this one thread, which owns the
+        # connection, so disk I/O never blocks the event loop
+        self._conn: sqlite3.Connection | None = None
+        self._db_path: Path | None = None
+        self.stale_ttl = 0
+        self.negative_ttl = 0
+        self.negative_hits = 0
+        self.max_bytes = 0
+        self.evictions = 0
+        self._disk_bytes = 0
+        self._accessed: dict[str, int] = {}
+        self._pending: dict[str, tuple] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+        # Serves hot entries without the worker thread or decoding them again
+        self.memory = MemoryCache(self.MEMORY_MAX_ENTRIES, self.MEMORY_MAX_BYTES)
+        self.disk_stats = CacheTierStats()
+        self.source_stats: dict[str, SourceStats] = {}
+        # Open while a source keeps failing, see async_get_or_fetch()
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="wh40k_cache"
+        )
+
+    async def _async_run(self, func: Any, *args: Any) -> Any:
+        """Run a synchronous cache method on the cache worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def configure(
+        self,
+        db_path: Path,
+        stale_ttl: int = 0,
+        negative_ttl: int = 0,
+        max_bytes: int = 0,
+    ) -> None:
+        """
+        Set the database file, expiry windows and size cap of the cache.
+
+        The file is opened lazily on the worker thread. Changing the path of an
+        already open cache takes effect after the next ``async_close()``. A
+        ``stale_ttl`` of 0 disables stale-while-revalidate, a ``negative_ttl``
+        of 0 disables caching of failed lookups and a ``max_bytes`` of 0 leaves
+        the cache size unbounded.
+        """
+        self._db_path = db_path
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+
+    def _ensure_db(self) -> sqlite3.Connection:
+        """Return the worker-owned connection, opening it on first use."""
+        if self._conn is None:
+            self.init_db()
+        return self._conn
+
     def init_db(self) -> None:
-        """Initialize the database connection and schema."""
-        base_dir = Path(__file__).resolve().parent
-        db_path = base_dir / "cache.db"
-        base_dir.mkdir(parents=True, exist_ok=True)
-
-        if db_path.exists():
-            # Recreate cache file when addon is initialised
-            db_path.unlink()
-
-        self._conn = sqlite3.connect(str(db_path))
-        self._conn.execute("""
-            CREATE TABLE IF NOT EXISTS cache (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                key TEXT NOT NULL UNIQUE,
-                created_at INTEGER NOT NULL,
-                data TEXT NOT NULL
+        """Open the database connection and bring the schema up to date."""
+        if self._db_path is None:
+            logger.warning("Cache database path not configured, using memory")
+            db_path = ":memory:"
+        else:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            db_path = str(self._db_path)
+
+        try:
+            self._conn = self._connect(db_path)
+            self._ensure_schema()
+        except sqlite3.DatabaseError:
+            if self._db_path is None:
+                raise
+            logger.warning("Cache database %s is corrupt, recreating", db_path)
+            if self._conn is not None:
+                self._conn.close()
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+            self._conn = self._connect(db_path)
+            self._ensure_schema()
+        self._disk_bytes = self._total_size()
+
+    def _connect(self, db_path: str) -> sqlite3.Connection:
+        """Open a connection in WAL mode with relaxed syncing."""
+        # The connection is only ever used from the cache worker thread
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Durable at checkpoints; a crash can only lose the last flushes
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def _ensure_schema(self) -> None:
+        """Create the cache schema, recreating it at any other version."""
+        conn = self._conn
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"
+        )
+        row = conn.execute("SELECT version FROM schema_version").fetchone()
+        version = row[0] if row else None
+        has_cache = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cache'"
+        ).fetchone()
+
+        if version == SCHEMA_VERSION and has_cache:
+            return
+
+        if has_cache:
+            logger.info(
+                "Cache schema version %s is not supported, recreating cache",
+                version,
             )
-        """)
-        self._conn.commit()
+        conn.execute("DROP TABLE IF EXISTS cache")
+        for statement in SCHEMA_CREATE_STATEMENTS:
+            conn.execute(statement)
+
+        conn.execute("DELETE FROM schema_version")
+        conn.execute(
+            "INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,)
+        )
+        conn.commit()
+
+    def close(self) -> None:
+        """Flush queued writes and close the database connection (blocking)."""
+        self.flush()
+        if self._conn is not None:
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
 
     def _make_key(self, tool: str, params: dict | None) -> str:
         params_str = (
@@ -54,60 +380,847 @@ class SQLiteCache:
         combined = tool + params_str
         return hashlib.md5(combined.encode(), usedforsecurity=False).hexdigest()
 
-    def _cleanup(self) -> None:
-        now = int(time.time())
-        cutoff = now - self.DEFAULT_MAX_AGE
-        deleted = self._conn.execute(
-            "DELETE FROM cache WHERE created_at < ?", (cutoff,)
-        ).rowcount
+    def sweep(self, accessed: dict[str, int] | None = None) -> int:
+        """
+        Run periodic maintenance and return the number of expired rows.
+
+        Writes batched access times, deletes expired rows and evicts least
+        recently accessed rows if the cache is over its size cap (blocking).
+        """
+        self.flush()
+        self._ensure_db()
+        if accessed:
+            self._conn.executemany(
+                "UPDATE cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in accessed.items()],
+            )
+        expired = Counter(
+            source
+            for (source,) in self._conn.execute(
+                "DELETE FROM cache WHERE expires_at <= ? RETURNING source",
+                (int(time.time()),),
+            )
+        )
         self._conn.commit()
+        for source, count in expired.items():
+            self.get_source_stats(source).expired += count
+        deleted = expired.total()
         if deleted:
-            logger.debug("Cache cleanup ran, deleted %d expired entries", deleted)
+            logger.debug("Cache sweep ran, deleted %d expired entries", deleted)
+        self.evict()
+        return deleted
 
-    def get(
-        self, tool: str, params: dict | None, max_age: int | None = None
-    ) -> Any | None:
-        """Retrieve a cached value by tool name and parameters."""
-        self._cleanup()
-        key = self._make_key(tool, params)
+    def _total_size(self) -> int:
+        """Refresh the per source entry counts and sizes, returning the total."""
+        sizes = {
+            source: (entries, size)
+            for source, entries, size in self._conn.execute(
+                "SELECT source, COUNT(*), SUM(size) FROM cache GROUP BY source"
+            )
+        }
+        for source in {*self.source_stats, *sizes}:
+            stats = self.get_source_stats(source)
+            stats.entries, stats.size_bytes = sizes.get(source, (0, 0))
+        return sum(size for _, size in sizes.values())
+
+    def evict(self) -> int:
+        """Evict least recently accessed rows while over the size cap (blocking)."""
+        self._ensure_db()
+        total = self._total_size()
+        self._disk_bytes = total
+        if not self.max_bytes or total <= self.max_bytes:
+            return 0
 
-        if max_age is not None:
-            now = int(time.time())
-            cutoff = now - max_age
-            cursor = self._conn.execute(
-                "SELECT data FROM cache WHERE key = ? AND created_at >= ?",
-                (key, cutoff),
+        # Keep the most recently accessed rows whose running total fits
+        target = int(self.max_bytes * self.EVICT_TARGET_RATIO)
+        sources = Counter(
+            source
+            for (source,) in self._conn.execute(
+                """
+                DELETE FROM cache WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, SUM(size) OVER (
+                            ORDER BY accessed_at DESC, id DESC
+                        ) AS running FROM cache
+                    ) WHERE running > ?
+                )
+                RETURNING source
+            """,
+                (target,),
             )
-        else:
-            cursor = self._conn.execute("SELECT data FROM cache WHERE key = ?", (key,))
+        )
+        self._conn.commit()
+        for source, count in sources.items():
+            self.get_source_stats(source).evictions += count
+        evicted = sources.total()
+        self._disk_bytes = self._total_size()
+        self.evictions += evicted
+        logger.debug(
+            "Cache over %d bytes, evicted %d entries (%d -> %d bytes)",
+            self.max_bytes,
+            evicted,
+            total,
+            self._disk_bytes,
+        )
+        return evicted
+
+    def invalidate(
+        self,
+        source: str | None = None,
+        label: str | None = None,
+        pattern: str | None = None,
+    ) -> int:
+        """
+        Delete matching rows and return how many (blocking).
+
+        ``source`` and ``label`` match exactly and ``pattern`` matches labels
+        starting with it. With a ``source`` these are ranges of the
+        ``(source, label)`` index, without one every row is scanned. With no
+        filter every row is deleted.
+        """
+        self.flush()
+        self._ensure_db()
+        clauses = []
+        args: list[str] = []
+        if source is not None:
+            clauses.append("source = ?")
+            args.append(source)
+        if label is not None:
+            clauses.append("label = ?")
+            args.append(label)
+        if pattern:
+            # Labels from pattern up to, not including, the next prefix
+            clauses.append("label >= ? AND label < ?")
+            args.extend((pattern, pattern[:-1] + chr(ord(pattern[-1]) + 1)))
+        elif pattern is not None:
+            # Every label starts with an empty pattern, unlabelled rows have ""
+            clauses.append("label != ''")
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        deleted = self._conn.execute(
+            f"DELETE FROM cache{where}",  # noqa: S608
+            args,
+        ).rowcount
+        self._conn.commit()
+        self._disk_bytes = self._total_size()
+        logger.debug("Invalidated %d cache entries", deleted)
+        return deleted
+
+    def export_snapshot(self, path: Path) -> int:
+        """
+        Write live entries to a gzipped JSON snapshot and return the count.
+
+        Failed lookups are left out, they only make sense on this install.
+        Payloads are copied in their stored encoding (blocking).
+        """
+        self.flush()
+        self._ensure_db()
+        rows = self._conn.execute(
+            """
+            SELECT key, created_at, expires_at, codec, source, label, data
+            FROM cache
+            WHERE expires_at > ? AND negative = 0
+        """,
+            (int(time.time()),),
+        ).fetchall()
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "exported_at": int(time.time()),
+            "entries": [
+                {
+                    "key": key,
+                    "created_at": created_at,
+                    "expires_at": expires_at,
+                    "codec": data_codec,
+                    "source": source,
+                    "label": label,
+                    "data": base64.b64encode(
+                        payload if isinstance(payload, bytes) else payload.encode()
+                    ).decode(),
+                }
+                for (
+                    key,
+                    created_at,
+                    expires_at,
+                    data_codec,
+                    source,
+                    label,
+                    payload,
+                ) in rows
+            ],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with gzip.open(tmp_path, "wb") as file:
+            file.write(codec.dumps(snapshot))
+        tmp_path.replace(path)
+        logger.info("Exported %d cache entries to %s", len(rows), path)
+        return len(rows)
+
+    def import_snapshot(self, path: Path) -> int:
+        """
+        Merge a snapshot into the cache and return how many rows were taken.
 
-        row = cursor.fetchone()
-        if row:
-            logger.debug("Cache hit for tool: %s Params: %s", tool, params)
+        Entries replace existing rows only when they were created later, and
+        expired or undecodable entries are skipped. Raises ``ValueError`` for
+        files that cannot be read or are not a supported snapshot (blocking).
+        """
+        try:
+            with gzip.open(path, "rb") as file:
+                snapshot = codec.loads(file.read())
+        except (OSError, EOFError, ValueError, zlib.error) as err:
+            msg = f"Failed to read cache snapshot {path}: {err}"
+            raise ValueError(msg) from err
+        if not isinstance(snapshot, dict) or snapshot.get("version") != (
+            SNAPSHOT_VERSION
+        ):
+            msg = f"Unsupported cache snapshot {path}"
+            raise ValueError(msg)
+
+        now = int(time.time())
+        rows = []
+        for entry in snapshot.get("entries", []):
             try:
-                return json.loads(row[0])
-            except json.JSONDecodeError:
-                logger.debug(
-                    "Failed to decode cached data for tool: %s Params: %s", tool, params
+                payload = base64.b64decode(entry["data"], validate=True)
+                row = (
+                    str(entry["key"]),
+                    int(entry["created_at"]),
+                    int(entry["expires_at"]),
+                    str(entry["codec"]),
+                    len(payload),
+                    int(entry["created_at"]),
+                    str(entry.get("source", "")),
+                    str(entry.get("label", "")),
+                    payload,
                 )
-                return None
-        else:
-            logger.debug("Cache miss for tool: %s Params: %s", tool, params)
-            return None
+            except (KeyError, TypeError, ValueError):
+                continue
+            if row[2] > now and row[3] in codec.CODECS:
+                rows.append(row)
 
-    def set(self, tool: str, params: dict | None, data: dict) -> None:
-        """Store a value in the cache."""
-        key = self._make_key(tool, params)
-        created_at = int(time.time())
-        data_json = json.dumps(data)
-        self._conn.execute(
+        self.flush()
+        self._ensure_db()
+        before = self._conn.total_changes
+        self._conn.executemany(
             """
-            INSERT INTO cache (key, created_at, data)
-            VALUES (?, ?, ?)
+            INSERT INTO cache (
+                key, created_at, expires_at, codec, size, accessed_at, source,
+                label, data
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(key) DO UPDATE SET
                 created_at=excluded.created_at,
+                expires_at=excluded.expires_at,
+                negative=0,
+                codec=excluded.codec,
+                size=excluded.size,
+                accessed_at=excluded.accessed_at,
+                source=excluded.source,
+                label=excluded.label,
                 data=excluded.data
+            WHERE excluded.created_at > cache.created_at
         """,
-            (key, created_at, data_json),
+            rows,
         )
         self._conn.commit()
+        imported = self._conn.total_changes - before
+        self.evict()
+        logger.info("Imported %d cache entries from %s", imported, path)
+        return imported
+
+    def _cutoff(self, max_age: int | None) -> int:
+        """Return the oldest acceptable created_at timestamp for a lookup."""
+        if max_age is None:
+            return 0
+        return int(time.time()) - max_age
+
+    def _read(self, key: str, cutoff: int) -> tuple[Any, int, int, int] | None:
+        """Return data, created_at, expires_at and size for a key (blocking)."""
+        if key in self._pending:
+            self.flush()
+        self._ensure_db()
+        row = self._conn.execute(
+            """
+            SELECT data, created_at, expires_at, negative, codec FROM cache
+            WHERE key = ? AND expires_at > ? AND created_at >= ?
+        """,
+            (key, int(time.time()), cutoff),
+        ).fetchone()
+        if not row:
+            return None
+
+        try:
+            data, size = codec.decode(row[4], row[0])
+        except ValueError:
+            logger.debug("Failed to decode cached data for key: %s", key)
+            return None
+        if row[3]:
+            data = CachedFailure(**data)
+        return data, row[1], row[2], size
+
+    def set(
+        self,
+        tool: str,
+        params: dict | None,
+        data: dict | CachedFailure,
+        created_at: int | None = None,
+        ttl: int | None = None,
+        *,
+        label: str = "",
+    ) -> int:
+        """Store a value in the cache and return its encoded size (blocking)."""
+        size = self.queue(tool, params, data, created_at, ttl, label=label)
+        self.flush()
+        return size
+
+    def touch(self, key: str, created_at: int, expires_at: int) -> bool:
+        """Renew the age of a row without rewriting its data (blocking)."""
+        if key in self._pending:
+            self.flush()
+        self._ensure_db()
+        cursor = self._conn.execute(
+            """
+            UPDATE cache SET created_at = ?, expires_at = ?, accessed_at = ?
+            WHERE key = ? AND NOT negative
+        """,
+            (created_at, expires_at, created_at, key),
+        )
+        self._conn.commit()
+        return cursor.rowcount > 0
+
+    def queue(
+        self,
+        tool: str,
+        params: dict | None,
+        data: dict | CachedFailure,
+        created_at: int | None = None,
+        ttl: int | None = None,
+        *,
+        label: str = "",
+    ) -> int:
+        """
+        Encode a value and queue it for the next flush (worker thread only).
+
+        Returns the encoded size. A full batch schedules a flush on the worker
+        without making the caller wait for it. ``label`` tags the row for
+        ``invalidate()``, such as a normalized query or a faction slug.
+        """
+        key = self._make_key(tool, params)
+        if created_at is None:
+            created_at = int(time.time())
+        expires_at = created_at + (self.DEFAULT_MAX_AGE if ttl is None else ttl)
+        negative = isinstance(data, CachedFailure)
+        if negative:
+            data = {"message": data.message, "not_found": data.not_found}
+        data_codec, payload, size = codec.encode(data)
+        self._pending[key] = (
+            key,
+            created_at,
+            expires_at,
+            negative,
+            data_codec,
+            len(payload),
+            created_at,
+            tool,
+            label,
+            payload,
+        )
+        if len(self._pending) == self.WRITE_BATCH_SIZE:
+            self._executor.submit(self.flush)
+        return size
+
+    def flush(self) -> int:
+        """Write queued values in a single transaction and return the count."""
+        if not self._pending:
+            return 0
+        self._ensure_db()
+        rows = list(self._pending.values())
+        try:
+            self._conn.executemany(
+                """
+                INSERT INTO cache (
+                    key, created_at, expires_at, negative, codec, size,
+                    accessed_at, source, label, data
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    created_at=excluded.created_at,
+                    expires_at=excluded.expires_at,
+                    negative=excluded.negative,
+                    codec=excluded.codec,
+                    size=excluded.size,
+                    accessed_at=excluded.accessed_at,
+                    source=excluded.source,
+                    label=excluded.label,
+                    data=excluded.data
+            """,
+                rows,
+            )
+            self._conn.commit()
+        except sqlite3.Error:
+            logger.exception("Failed to write %d cache entries", len(rows))
+            self._conn.rollback()
+            raise
+        finally:
+            self._pending.clear()
+        logger.debug("Flushed %d cache entries", len(rows))
+
+        # Approximate running total; evict() recomputes it exactly
+        self._disk_bytes += sum(row[5] for row in rows)
+        if self.max_bytes and self._disk_bytes > self.max_bytes:
+            self.evict()
+        return len(rows)
+
+    async def _async_lookup(self, key: str, cutoff: int) -> tuple[Any, int] | None:
+        """Return data and created_at from the memory tier or the database."""
+        entry = self.memory.get_entry(key, cutoff)
+        if entry is not None:
+            logger.debug("Memory cache hit for key: %s", key)
+            self._accessed[key] = int(time.time())
+            return entry
+
+        row = await self._async_run(self._read, key, cutoff)
+        if row is None:
+            self.disk_stats.misses += 1
+            logger.debug("Cache miss for key: %s", key)
+            return None
+
+        self.disk_stats.hits += 1
+        self._accessed[key] = int(time.time())
+        logger.debug("Cache hit for key: %s", key)
+        data, created_at, expires_at, size = row
+        self.memory.put(key, data, created_at, expires_at, size)
+        return data, created_at
+
+    async def async_get(
+        self, tool: str, params: dict | None, max_age: int | None = None
+    ) -> Any | None:
+        """Retrieve a cached value without blocking the event loop."""
+        entry = await self._async_lookup(
+            self._make_key(tool, params), self._cutoff(max_age)
+        )
+        if entry is None or isinstance(entry[0], CachedFailure):
+            return None
+        return entry[0]
+
+    async def async_set(
+        self,
+        tool: str,
+        params: dict | None,
+        data: dict | CachedFailure,
+        ttl: int | None = None,
+        *,
+        label: str = "",
+    ) -> None:
+        """Store a value in memory and queue it for the database."""
+        created_at = int(time.time())
+        expires_at = created_at + (self.DEFAULT_MAX_AGE if ttl is None else ttl)
+        size = await self._async_run(
+            partial(self.queue, label=label), tool, params, data, created_at, ttl
+        )
+        self.memory.put(
+            self._make_key(tool, params), data, created_at, expires_at, size
+        )
+
+    async def async_touch(self, tool: str, params: dict | None, ttl: int) -> bool:
+        """Renew the age of a stored value, False if it is no longer stored."""
+        key = self._make_key(tool, params)
+        created_at = int(time.time())
+        expires_at = created_at + ttl
+        if not await self._async_run(self.touch, key, created_at, expires_at):
+            return False
+        self.memory.touch(key, created_at, expires_at)
+        return True
+
+    async def async_get_or_fetch(
+        self,
+        hass: "HomeAssistant",
+        tool: str,
+        params: dict | None,
+        fetch: Callable[[], Awaitable[dict]],
+        ttl: int,
+        *,
+        accept: Callable[[Any], bool] | None = None,
+        label: str = "",
+        revalidate: Callable[[Any], Awaitable[dict]] | None = None,
+        deadline: float | None = None,
+    ) -> Any:
+        """
+        Return a cached value, calling fetch and storing its result on a miss.
+
+        fetch raises a ``FetchError`` when there is nothing worth caching. A
+        lookup still waiting at ``deadline`` (event loop time) raises
+        ``TimeoutError``, or returns a stale entry marked ``"partial": True``.
+        """
+        started = time.perf_counter()
+        stats = self.get_source_stats(tool)
+        breaker = self.get_breaker(tool)
+        key = self._make_key(tool, params)
+        stale = None
+        # A failure must not replace a good entry, even one rejected by accept
+        cached = False
+        entry = await self._async_lookup(key, 0)
+        if entry is not None:
+            data, created_at = entry
+            if isinstance(data, CachedFailure):
+                # Failures are remembered for negative_ttl seconds
+                self.negative_hits += 1
+                stats.negative_hits += 1
+                logger.debug("Negative cache hit for tool: %s", tool)
+                raise data.to_exception()
+            cached = True
+            # accept rejects a value not covering the request, such as a
+            # smaller result set than asked for, which is fetched again
+            if accept is None or accept(data):
+                if created_at > time.time() - ttl:
+                    stats.hits += 1
+                    stats.hit_time += time.perf_counter() - started
+                    return data
+                # Within stale_ttl past the TTL the entry is served as is and
+                # refreshed in the background. Rows kept longer for revalidation
+                # are refreshed before use once past that window
+                if self.stale_ttl and created_at > time.time() - ttl - self.stale_ttl:
+                    self._async_schedule_refresh(
+                        hass,
+                        key,
+                        tool,
+                        params,
+                        fetch,
+                        ttl,
+                        label=label,
+                        revalidate=revalidate,
+                        stale=data,
+                    )
+                    stats.hits += 1
+                    stats.stale_hits += 1
+                    stats.hit_time += time.perf_counter() - started
+                    return data
+                stale = data
+
+        # While the breaker is open the upstream is not contacted
+        if key not in self._inflight and not breaker.allow():
+            if stale is not None:
+                logger.debug("Circuit open for %s, serving stale entry", tool)
+                stats.hits += 1
+                stats.stale_hits += 1
+                stats.hit_time += time.perf_counter() - started
+                return stale
+            msg = f"{tool} is unavailable, retrying in {breaker.retry_in} seconds"
+            raise FetchError(msg)
+
+        stats.misses += 1
+
+        # Concurrent misses for a key share one fetch, shielded so a caller
+        # cancelled or out of time leaves it to complete and be cached for the
+        # next call. A failure does not replace a stale entry, which is served
+        # instead.
+        try:
+            async with asyncio.timeout_at(deadline):
+                data = await asyncio.shield(
+                    self._async_shared_fetch(
+                        hass,
+                        key,
+                        tool,
+                        params,
+                        fetch,
+                        ttl,
+                        label=label,
+                        cache_failures=not cached,
+                        revalidate=revalidate,
+                        stale=stale,
+                    )
+                )
+                if accept is not None and not accept(data):
+                    # Joined a fetch for a smaller request, run our own without
+                    # replacing the result it stored
+                    data = await asyncio.shield(
+                        self._async_shared_fetch(
+                            hass,
+                            key,
+                            tool,
+                            params,
+                            fetch,
+                            ttl,
+                            label=label,
+                            cache_failures=False,
+                            revalidate=revalidate,
+                        )
+                    )
+        except NotFoundError:
+            # The upstream answered, the entry is gone rather than unreachable
+            raise
+        except (FetchError, TimeoutError) as err:
+            if stale is None:
+                raise
+            logger.debug("Refresh of %s failed, serving stale: %r", tool, err)
+            return {**stale, "partial": True}
+        return data
+
+    def _async_shared_fetch(
+        self,
+        hass: "HomeAssistant",
+        key: str,
+        tool: str,
+        params: dict | None,
+        fetch: Callable[[], Awaitable[dict]],
+        ttl: int,
+        *,
+        label: str,
+        cache_failures: bool = True,
+        revalidate: Callable[[Any], Awaitable[dict]] | None = None,
+        stale: Any = None,
+    ) -> asyncio.Task:
+        """Return the in-flight fetch task for key, starting one if needed."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            logger.debug(
+                "Joining in-flight fetch for tool: %s Params: %s", tool, params
+            )
+            return task
+
+        task = hass.async_create_background_task(
+            self._async_fetch_and_set(
+                tool,
+                params,
+                fetch,
+                ttl,
+                label=label,
+                cache_failures=cache_failures,
+                revalidate=revalidate,
+                stale=stale,
+            ),
+            name=f"wh40k cache fetch {tool}",
+        )
+        self._inflight[key] = task
+        task.add_done_callback(partial(self._async_fetch_done, key))
+        return task
+
+    @callback
+    def _async_fetch_done(self, key: str, task: asyncio.Task) -> None:
+        """Forget a finished in-flight fetch."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved; waiters re-raise it themselves
+            task.exception()
+
+    async def _async_fetch_and_set(
+        self,
+        tool: str,
+        params: dict | None,
+        fetch: Callable[[], Awaitable[dict]],
+        ttl: int,
+        *,
+        label: str,
+        cache_failures: bool,
+        revalidate: Callable[[Any], Awaitable[dict]] | None,
+        stale: Any,
+    ) -> dict:
+        """Fetch a fresh value and store it, keeping it past ttl when stale."""
+        breaker = self.get_breaker(tool)
+        try:
+            if revalidate is not None and stale is not None:
+                data = await revalidate(stale)
+            else:
+                data = await fetch()
+        except NotFoundError as err:
+            # The upstream answered, there is just nothing to find
+            breaker.record_success()
+            await self._async_set_failure(
+                tool,
+                params,
+                CachedFailure(str(err), not_found=True),
+                label=label,
+                cache_failures=cache_failures,
+            )
+            raise
+        except FetchError as err:
+            breaker.record_failure()
+            await self._async_set_failure(
+                tool,
+                params,
+                CachedFailure(str(err)),
+                label=label,
+                cache_failures=cache_failures,
+            )
+            raise
+        except TimeoutError as err:
+            breaker.record_failure()
+            logger.warning("Request for %s timed out", tool)
+            failure = CachedFailure("Upstream request timed out")
+            await self._async_set_failure(
+                tool, params, failure, label=label, cache_failures=cache_failures
+            )
+            raise failure.to_exception() from err
+        except aiohttp.ClientError as err:
+            breaker.record_failure()
+            logger.warning("Request for %s failed: %s", tool, err)
+            failure = CachedFailure(f"Upstream request failed: {err}")
+            await self._async_set_failure(
+                tool, params, failure, label=label, cache_failures=cache_failures
+            )
+            raise failure.to_exception() from err
+        except Exception:
+            # Unexpected errors must not leave a trial fetch pending forever
+            breaker.record_failure()
+            raise
+
+        breaker.record_success()
+        keep = self.stale_ttl
+        if revalidate is not None:
+            keep = max(keep, self.REVALIDATE_TTL)
+        if data is stale and await self.async_touch(tool, params, ttl + keep):
+            self.get_source_stats(tool).revalidated += 1
+            logger.debug("Revalidated unchanged cache entry for tool: %s", tool)
+            return data
+        await self.async_set(tool, params, data, ttl=ttl + keep, label=label)
+        return data
+
+    async def _async_set_failure(
+        self,
+        tool: str,
+        params: dict | None,
+        failure: CachedFailure,
+        *,
+        label: str,
+        cache_failures: bool,
+    ) -> None:
+        """Store a negative entry if failure caching is enabled."""
+        if cache_failures and self.negative_ttl:
+            await self.async_set(
+                tool, params, failure, ttl=self.negative_ttl, label=label
+            )
+
+    def _async_schedule_refresh(
+        self,
+        hass: "HomeAssistant",
+        key: str,
+        tool: str,
+        params: dict | None,
+        fetch: Callable[[], Awaitable[dict]],
+        ttl: int,
+        *,
+        label: str,
+        revalidate: Callable[[Any], Awaitable[dict]] | None,
+        stale: Any,
+    ) -> None:
+        """Refresh a stale entry in the background unless already in progress."""
+        if key in self._inflight or not self.get_breaker(tool).allow():
+            return
+
+        # A failed refresh keeps serving the stale entry rather than caching
+        # the failure over it
+        task = self._async_shared_fetch(
+            hass,
+            key,
+            tool,
+            params,
+            fetch,
+            ttl,
+            label=label,
+            cache_failures=False,
+            revalidate=revalidate,
+            stale=stale,
+        )
+
+        async def _async_refresh() -> None:
+            try:
+                await task
+            except Exception as err:
+                logger.debug("Failed to refresh stale cache entry %s: %s", key, err)
+
+        logger.debug("Serving stale cache entry %s while refreshing", key)
+        hass.async_create_background_task(
+            _async_refresh(), name=f"wh40k cache refresh {tool}"
+        )
+
+    def get_source_stats(self, source: str) -> SourceStats:
+        """Return the counters for a source, creating them on first use."""
+        return self.source_stats.setdefault(source, SourceStats())
+
+    def get_breaker(self, source: str) -> CircuitBreaker:
+        """Return the circuit breaker for a source, creating it on first use."""
+        if (breaker := self.breakers.get(source)) is None:
+            breaker = self.breakers[source] = CircuitBreaker(
+                self.BREAKER_THRESHOLD, self.BREAKER_COOLDOWN
+            )
+        return breaker
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return a snapshot of all cache counters."""
+        return {
+            "sources": {
+                source: stats.as_dict()
+                for source, stats in list(self.source_stats.items())
+            },
+            "memory": {
+                "entries": len(self.memory),
+                "size_bytes": self.memory.size_bytes,
+                "hits": self.memory.stats.hits,
+                "misses": self.memory.stats.misses,
+            },
+            "disk": {
+                "size_bytes": self._disk_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.disk_stats.hits,
+                "misses": self.disk_stats.misses,
+                "evictions": self.evictions,
+                "pending_writes": len(self._pending),
+            },
+            "circuit_breakers": {
+                source: breaker.as_dict()
+                for source, breaker in list(self.breakers.items())
+            },
+            "coalesced": self.coalesced,
+            "negative_hits": self.negative_hits,
+        }
+
+    async def async_flush(self) -> int:
+        """Write queued values without blocking the event loop."""
+        if not self._pending:
+            return 0
+        return await self._async_run(self.flush)
+
+    async def async_sweep(self) -> int:
+        """Run periodic maintenance without blocking the event loop."""
+        accessed, self._accessed = self._accessed, {}
+        return await self._async_run(self.sweep, accessed)
+
+    async def async_invalidate(
+        self,
+        source: str | None = None,
+        label: str | None = None,
+        pattern: str | None = None,
+    ) -> int:
+        """Delete matching entries from both tiers and return how many."""
+        deleted = await self._async_run(self.invalidate, source, label, pattern)
+        # Memory may hold matching rows already evicted or swept from disk,
+        # which the purge cannot report, so all of it refills from disk
+        self.memory.clear()
+        return deleted
+
+    async def async_export_snapshot(self, path: Path) -> int:
+        """Write a snapshot without blocking the event loop."""
+        return await self._async_run(self.export_snapshot, path)
+
+    async def async_import_snapshot(self, path: Path) -> int:
+        """Merge a snapshot without blocking the event loop."""
+        imported = await self._async_run(self.import_snapshot, path)
+        # Imported rows may be newer than what the memory tier holds
+        self.memory.clear()
+        return imported
+
+    async def async_close(self) -> None:
+        """Close the database connection without blocking the event loop."""
+        self.memory.clear()
+        if self._accessed:
+            await self.async_sweep()
+        await self._async_run(self.close)
+
+    async def async_shutdown(self) -> None:
+        """Close the cache and stop its worker thread, retiring the instance."""
+        await self.async_close()
+        # Join the idle worker off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        if SQLiteCache._instance is self:
+            SQLiteCache._instance = None
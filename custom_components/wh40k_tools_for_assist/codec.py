@@ -0,0 +1,67 @@
+"""Payload codecs for the WH40k tools cache."""
+
+import json
+import zlib
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Codec tags stored alongside each cache row
+CODEC_JSON = "json"
+CODEC_JSON_ZLIB = "json+zlib"
+CODECS = (CODEC_JSON, CODEC_JSON_ZLIB)
+
+# Payloads smaller than this are stored uncompressed, where zlib saves little
+COMPRESS_MIN_SIZE = 512
+COMPRESS_LEVEL = 6
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize data to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads(raw: bytes | str) -> Any:
+    """Deserialize JSON bytes or text, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def encode(data: Any) -> tuple[str, bytes, int]:
+    """
+    Encode data for storage.
+
+    Returns the codec tag, the payload to store and the uncompressed size in
+    bytes, which callers use to account for the decoded value in memory.
+    """
+    raw = dumps(data)
+    if len(raw) < COMPRESS_MIN_SIZE:
+        return CODEC_JSON, raw, len(raw)
+    return CODEC_JSON_ZLIB, zlib.compress(raw, COMPRESS_LEVEL), len(raw)
+
+
+def decode(codec: str, payload: bytes | str) -> tuple[Any, int]:
+    """
+    Decode a stored payload.
+
+    Rows written before codecs were introduced hold JSON text and are tagged
+    ``json``. Returns the decoded data and its uncompressed size in bytes.
+    Raises ValueError for unknown codecs or undecodable payloads.
+    """
+    if codec == CODEC_JSON:
+        return loads(payload), len(payload)
+    if codec == CODEC_JSON_ZLIB:
+        try:
+            raw = zlib.decompress(payload)
+        except zlib.error as err:
+            raise ValueError(str(err)) from err
+        return loads(raw), len(raw)
+
+    msg = f"Unknown cache codec: {codec}"
+    raise ValueError(msg)
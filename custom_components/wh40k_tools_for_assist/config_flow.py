@@ -11,11 +11,24 @@ from homeassistant.core import callback
 
 from .const import (
     ADDON_NAME,
+    CONF_CACHE_CUSTOMIZE,
+    CONF_CACHE_MAX_SIZE,
+    CONF_CACHE_NEGATIVE_TTL,
+    CONF_CACHE_STALE_TTL,
+    CONF_CACHE_STALE_WHILE_REVALIDATE,
+    CONF_CACHE_SWEEP_INTERVAL,
+    CONF_RESPONSE_DEADLINE,
+    CONF_WH40K_FANDOM_CACHE_TTL,
     CONF_WH40K_FANDOM_ENABLED,
+    CONF_WH40K_FANDOM_MAX_CHARS,
     CONF_WH40K_FANDOM_NUM_RESULTS,
+    CONF_WH40K_LEXICANUM_CACHE_TTL,
     CONF_WH40K_LEXICANUM_ENABLED,
+    CONF_WH40K_LEXICANUM_MAX_CHARS,
     CONF_WH40K_LEXICANUM_NUM_RESULTS,
+    CONF_WH40K_WAHAPEDIA_CACHE_TTL,
     CONF_WH40K_WAHAPEDIA_ENABLED,
+    CONF_WH40K_WAHAPEDIA_MAX_CHARS,
     CONF_WH40K_WAHAPEDIA_NUM_RESULTS,
     DOMAIN,
     SERVICE_DEFAULTS,
@@ -32,6 +45,7 @@ STEP_USER = "user"
 STEP_WH40K_LEXICANUM = "wh40k_lexicanum"
 STEP_WH40K_FANDOM = "wh40k_fandom"
 STEP_WH40K_WAHAPEDIA = "wh40k_wahapedia"
+STEP_CACHE = "cache"
 STEP_INIT = "init"
 
 
@@ -41,6 +55,7 @@ def get_step_user_data_schema(hass) -> vol.Schema:
         vol.Optional(CONF_WH40K_LEXICANUM_ENABLED, default=False): bool,
         vol.Optional(CONF_WH40K_FANDOM_ENABLED, default=False): bool,
         vol.Optional(CONF_WH40K_WAHAPEDIA_ENABLED, default=False): bool,
+        vol.Optional(CONF_CACHE_CUSTOMIZE, default=False): bool,
     }
     return vol.Schema(schema)
 
@@ -53,6 +68,14 @@ def get_wh40k_lexicanum_schema(hass) -> vol.Schema:
                 CONF_WH40K_LEXICANUM_NUM_RESULTS,
                 default=SERVICE_DEFAULTS.get(CONF_WH40K_LEXICANUM_NUM_RESULTS),
             ): vol.All(int, vol.Range(min=1, max=20)),
+            vol.Required(
+                CONF_WH40K_LEXICANUM_CACHE_TTL,
+                default=SERVICE_DEFAULTS.get(CONF_WH40K_LEXICANUM_CACHE_TTL),
+            ): vol.All(int, vol.Range(min=1, max=10080)),
+            vol.Required(
+                CONF_WH40K_LEXICANUM_MAX_CHARS,
+                default=SERVICE_DEFAULTS.get(CONF_WH40K_LEXICANUM_MAX_CHARS),
+            ): vol.All(int, vol.Range(min=200, max=20000)),
         }
     )
 
@@ -65,6 +88,14 @@ def get_wh40k_fandom_schema(hass) -> vol.Schema:
                 CONF_WH40K_FANDOM_NUM_RESULTS,
                 default=SERVICE_DEFAULTS.get(CONF_WH40K_FANDOM_NUM_RESULTS),
             ): vol.All(int, vol.Range(min=1, max=20)),
+            vol.Required(
+                CONF_WH40K_FANDOM_CACHE_TTL,
+                default=SERVICE_DEFAULTS.get(CONF_WH40K_FANDOM_CACHE_TTL),
+            ): vol.All(int, vol.Range(min=1, max=10080)),
+            vol.Required(
+                CONF_WH40K_FANDOM_MAX_CHARS,
+                default=SERVICE_DEFAULTS.get(CONF_WH40K_FANDOM_MAX_CHARS),
+            ): vol.All(int, vol.Range(min=200, max=20000)),
         }
     )
 
@@ -77,6 +108,46 @@ def get_wh40k_wahapedia_schema(hass) -> vol.Schema:
                 CONF_WH40K_WAHAPEDIA_NUM_RESULTS,
                 default=SERVICE_DEFAULTS.get(CONF_WH40K_WAHAPEDIA_NUM_RESULTS),
             ): vol.All(int, vol.Range(min=1, max=10)),
+            vol.Required(
+                CONF_WH40K_WAHAPEDIA_CACHE_TTL,
+                default=SERVICE_DEFAULTS.get(CONF_WH40K_WAHAPEDIA_CACHE_TTL),
+            ): vol.All(int, vol.Range(min=1, max=10080)),
+            vol.Required(
+                CONF_WH40K_WAHAPEDIA_MAX_CHARS,
+                default=SERVICE_DEFAULTS.get(CONF_WH40K_WAHAPEDIA_MAX_CHARS),
+            ): vol.All(int, vol.Range(min=200, max=20000)),
+        }
+    )
+
+
+def get_cache_schema(hass) -> vol.Schema:
+    """Return the static schema for cache configuration."""
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_CACHE_SWEEP_INTERVAL,
+                default=SERVICE_DEFAULTS.get(CONF_CACHE_SWEEP_INTERVAL),
+            ): vol.All(int, vol.Range(min=1, max=1440)),
+            vol.Required(
+                CONF_CACHE_STALE_WHILE_REVALIDATE,
+                default=SERVICE_DEFAULTS.get(CONF_CACHE_STALE_WHILE_REVALIDATE),
+            ): bool,
+            vol.Required(
+                CONF_CACHE_STALE_TTL,
+                default=SERVICE_DEFAULTS.get(CONF_CACHE_STALE_TTL),
+            ): vol.All(int, vol.Range(min=1, max=10080)),
+            vol.Required(
+                CONF_CACHE_NEGATIVE_TTL,
+                default=SERVICE_DEFAULTS.get(CONF_CACHE_NEGATIVE_TTL),
+            ): vol.All(int, vol.Range(min=0, max=1440)),
+            vol.Required(
+                CONF_CACHE_MAX_SIZE,
+                default=SERVICE_DEFAULTS.get(CONF_CACHE_MAX_SIZE),
+            ): vol.All(int, vol.Range(min=0, max=10240)),
+            vol.Required(
+                CONF_RESPONSE_DEADLINE,
+                default=SERVICE_DEFAULTS.get(CONF_RESPONSE_DEADLINE),
+            ): vol.All(int, vol.Range(min=1, max=60)),
         }
     )
 
@@ -86,6 +157,7 @@ STEP_ORDER = {
     STEP_WH40K_LEXICANUM: [CONF_WH40K_LEXICANUM_ENABLED, get_wh40k_lexicanum_schema],
     STEP_WH40K_FANDOM: [CONF_WH40K_FANDOM_ENABLED, get_wh40k_fandom_schema],
     STEP_WH40K_WAHAPEDIA: [CONF_WH40K_WAHAPEDIA_ENABLED, get_wh40k_wahapedia_schema],
+    STEP_CACHE: [CONF_CACHE_CUSTOMIZE, get_cache_schema],
 }
 
 
@@ -195,6 +267,12 @@ class Wh40kToolsConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle Warhammer 40k Wahapedia configuration step."""
         return await self.handle_step(STEP_WH40K_WAHAPEDIA, user_input)
 
+    async def async_step_cache(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Handle cache configuration step."""
+        return await self.handle_step(STEP_CACHE, user_input)
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
@@ -239,6 +317,10 @@ class Wh40kToolsOptionsFlow(config_entries.OptionsFlowWithReload):
                     CONF_WH40K_WAHAPEDIA_ENABLED,
                     default=defaults.get(CONF_WH40K_WAHAPEDIA_ENABLED, False),
                 ): bool,
+                vol.Optional(
+                    CONF_CACHE_CUSTOMIZE,
+                    default=defaults.get(CONF_CACHE_CUSTOMIZE, False),
+                ): bool,
             }
             schema = vol.Schema(schema_dict)
             return self.async_show_form(
@@ -325,3 +407,9 @@ class Wh40kToolsOptionsFlow(config_entries.OptionsFlowWithReload):
     ) -> config_entries.FlowResult:
         """Handle Warhammer 40k Wahapedia configuration step in options flow."""
         return await self.handle_step(STEP_WH40K_WAHAPEDIA, user_input)
+
+    async def async_step_cache(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.FlowResult:
+        """Handle cache configuration step in options flow."""
+        return await self.handle_step(STEP_CACHE, user_input)
@@ -14,27 +14,63 @@ WH40K_API_NAME = "Warhammer 40k Lore"
 
 CONF_CACHE_MAX_AGE = "cache_max_age"
 
+# Cache database file, stored under the Home Assistant storage directory
+CACHE_DB_FILENAME = "cache.db"
+# Snapshot written by export_cache and merged into the cache at startup
+CACHE_SNAPSHOT_FILENAME = "cache_snapshot.json.gz"
+
+CONF_CACHE_CUSTOMIZE = "cache_customize"
+CONF_CACHE_SWEEP_INTERVAL = "cache_sweep_interval"  # minutes
+CONF_CACHE_STALE_WHILE_REVALIDATE = "cache_stale_while_revalidate"
+CONF_CACHE_STALE_TTL = "cache_stale_ttl"  # minutes past the source TTL
+CONF_CACHE_NEGATIVE_TTL = "cache_negative_ttl"  # minutes
+CONF_CACHE_MAX_SIZE = "cache_max_size"  # megabytes, 0 for unbounded
+CONF_RESPONSE_DEADLINE = "response_deadline"  # seconds per tool call
+
+# Services
+
+SERVICE_EXPORT_CACHE = "export_cache"
+SERVICE_IMPORT_CACHE = "import_cache"
+SERVICE_CLEAR_CACHE = "clear_cache"
+SERVICE_INVALIDATE_CACHE = "invalidate"
+ATTR_PATH = "path"
+ATTR_SOURCE = "source"
+ATTR_FACTION = "faction"
+ATTR_QUERY = "query"
+
 WH40K_SERVICES_PROMPT = """
 You may use the Warhammer 40k tools to look up information about the Warhammer 40,000 universe.
 - Use the Lexicanum tool for concise, curated lore information.
 - Use the Fandom tool for more detailed and comprehensive lore articles.
 - Use the Wahapedia tool for 10th edition game rules, mechanics, stratagems, and faction-specific rules.
+- Use the search all sources tool when unsure which source covers a question; one call searches every source at once.
+- To look up several subjects, such as to compare them, pass them together as queries in one call.
+- Results marked partial were cut short to answer quickly and may only contain search snippets.
 """.strip()
 
 # Warhammer 40k Lexicanum-specific constants
 
+SOURCE_WH40K_LEXICANUM = "lexicanum"
 CONF_WH40K_LEXICANUM_ENABLED = "wh40k_lexicanum_enabled"
 CONF_WH40K_LEXICANUM_NUM_RESULTS = "wh40k_lexicanum_num_results"
+CONF_WH40K_LEXICANUM_CACHE_TTL = "wh40k_lexicanum_cache_ttl"  # minutes
+CONF_WH40K_LEXICANUM_MAX_CHARS = "wh40k_lexicanum_max_chars"  # per tool call
 
 # Warhammer 40k Fandom-specific constants
 
+SOURCE_WH40K_FANDOM = "fandom"
 CONF_WH40K_FANDOM_ENABLED = "wh40k_fandom_enabled"
 CONF_WH40K_FANDOM_NUM_RESULTS = "wh40k_fandom_num_results"
+CONF_WH40K_FANDOM_CACHE_TTL = "wh40k_fandom_cache_ttl"  # minutes
+CONF_WH40K_FANDOM_MAX_CHARS = "wh40k_fandom_max_chars"  # per tool call
 
 # Warhammer 40k Wahapedia-specific constants
 
+SOURCE_WH40K_WAHAPEDIA = "wahapedia"
 CONF_WH40K_WAHAPEDIA_ENABLED = "wh40k_wahapedia_enabled"
 CONF_WH40K_WAHAPEDIA_NUM_RESULTS = "wh40k_wahapedia_num_results"
+CONF_WH40K_WAHAPEDIA_CACHE_TTL = "wh40k_wahapedia_cache_ttl"  # minutes
+CONF_WH40K_WAHAPEDIA_MAX_CHARS = "wh40k_wahapedia_max_chars"  # per tool call
 
 # Core game rules URLs
 WAHAPEDIA_RULES_URLS = {
@@ -80,7 +116,19 @@ WAHAPEDIA_FACTIONS = [
 # Service defaults
 
 SERVICE_DEFAULTS = {
+    CONF_CACHE_SWEEP_INTERVAL: 15,
+    CONF_CACHE_STALE_WHILE_REVALIDATE: True,
+    CONF_CACHE_STALE_TTL: 1440,
+    CONF_CACHE_NEGATIVE_TTL: 5,
+    CONF_CACHE_MAX_SIZE: 50,
+    CONF_RESPONSE_DEADLINE: 8,
     CONF_WH40K_LEXICANUM_NUM_RESULTS: 1,
+    CONF_WH40K_LEXICANUM_CACHE_TTL: 120,
+    CONF_WH40K_LEXICANUM_MAX_CHARS: 1500,
     CONF_WH40K_FANDOM_NUM_RESULTS: 1,
+    CONF_WH40K_FANDOM_CACHE_TTL: 120,
+    CONF_WH40K_FANDOM_MAX_CHARS: 1500,
     CONF_WH40K_WAHAPEDIA_NUM_RESULTS: 1,
+    CONF_WH40K_WAHAPEDIA_CACHE_TTL: 1440,
+    CONF_WH40K_WAHAPEDIA_MAX_CHARS: 3000,
 }
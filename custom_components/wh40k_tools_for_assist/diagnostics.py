@@ -0,0 +1,19 @@
+"""Diagnostics support for WH40k Tools for Assist."""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .cache import SQLiteCache
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    return {
+        "data": dict(entry.data),
+        "options": dict(entry.options),
+        "cache": SQLiteCache().get_stats(),
+    }
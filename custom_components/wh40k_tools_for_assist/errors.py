@@ -0,0 +1,13 @@
+"""Errors raised by WH40k tools upstream fetches."""
+
+
+class FetchError(Exception):
+    """
+    Raised by a cache fetch function when the upstream request failed.
+
+    The message is suitable for returning to the LLM as an error.
+    """
+
+
+class NotFoundError(FetchError):
+    """Raised by a cache fetch function when the upstream had no results."""
@@ -1,19 +1,25 @@
 """LLM function implementations for Warhammer 40k lore services."""
 
+import asyncio
 import logging
 from typing import Any
 
+import voluptuous as vol
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import llm
+from homeassistant.util.json import JsonObjectType
 
+from .budget import share_budget, trim_text
 from .const import (
     CONF_WH40K_FANDOM_ENABLED,
     CONF_WH40K_LEXICANUM_ENABLED,
     CONF_WH40K_WAHAPEDIA_ENABLED,
     DOMAIN,
+    SERVICE_DEFAULTS,
     WH40K_API_NAME,
     WH40K_SERVICES_PROMPT,
 )
+from .query import normalize_query
 from .wh40k_fandom import SearchWh40kFandomTool
 from .wh40k_lexicanum import SearchWh40kLexicanumTool
 from .wh40k_wahapedia import SearchWh40kWahapediaTool
@@ -27,6 +33,154 @@ WH40K_CONF_ENABLED_MAP = [
 ]
 
 
+def _title_rank(query: str, title: str) -> int:
+    """Rank a result title, 0 for the query itself, 1 containing it, else 2."""
+    title = normalize_query(title)
+    if title == query:
+        return 0
+    return 1 if query in title else 2
+
+
+def merge_results(query: str, responses: dict[str, dict]) -> list[dict]:
+    """
+    Merge the results of several sources into one ranked list.
+
+    Results titled exactly as the query come first, then those whose title
+    contains it, each in the order the sources ranked them. Articles found
+    on more than one wiki, and rule sections repeated across pages, are
+    kept once with the URLs of their copies in ``also_at``.
+    """
+    query = normalize_query(query)
+    ranked = sorted(
+        (
+            (_title_rank(query, result["title"]), position, order, source, result)
+            for order, (source, response) in enumerate(responses.items())
+            for position, result in enumerate(response.get("results", []))
+        ),
+        key=lambda item: item[:3],
+    )
+    merged: dict[tuple[str, str], dict] = {}
+    for *_, source, result in ranked:
+        # Lore articles and rule sections of the same name are both kept
+        key = (
+            "rules" if "content" in result else "lore",
+            normalize_query(result["title"]),
+        )
+        if (kept := merged.get(key)) is None:
+            merged[key] = {"source": source, **result}
+        elif result["url"] != kept["url"]:
+            kept.setdefault("also_at", []).append(result["url"])
+    return list(merged.values())
+
+
+class SearchWh40kAllTool(llm.Tool):
+    """
+    Tool searching every enabled Warhammer 40k source in one call.
+
+    The sources are searched concurrently, each answering within the
+    response deadline, so the call takes no longer than the slowest source
+    and replaces a tool call per source.
+    """
+
+    name = "search_wh40k_all_sources"
+    description = (
+        "Search every enabled Warhammer 40k source at once, lore wikis and game "
+        "rules, and return one merged list of results. Use this when unsure which "
+        "source covers a question instead of calling each source tool in turn."
+    )
+
+    parameters = vol.Schema(
+        {
+            vol.Required(
+                "query",
+                description="The Warhammer 40k subject, rule or keyword to search for",
+            ): str,
+            vol.Optional(
+                "faction",
+                description="Optional faction name for faction-specific game rules",
+            ): str,
+        }
+    )
+
+    def __init__(self, tools: list[llm.Tool]) -> None:
+        """Initialize the tool with the source tools to search."""
+        self.tools = tools
+
+    async def async_call(
+        self,
+        hass: HomeAssistant,
+        tool_input: llm.ToolInput,
+        llm_context: llm.LLMContext,
+    ) -> JsonObjectType:
+        """Call the tool."""
+        query = tool_input.tool_args["query"]
+        _LOGGER.info("Search of all sources requested for: %s", query)
+
+        responses = await asyncio.gather(
+            *(
+                tool.async_call(
+                    hass,
+                    llm.ToolInput(
+                        tool_name=tool.name,
+                        tool_args={
+                            key: value
+                            for key, value in tool_input.tool_args.items()
+                            if key in tool.parameters.schema
+                        },
+                    ),
+                    llm_context,
+                )
+                for tool in self.tools
+            ),
+            return_exceptions=True,
+        )
+
+        results: dict[str, dict] = {}
+        errors: dict[str, str] = {}
+        partial = False
+        for tool, response in zip(self.tools, responses, strict=True):
+            if isinstance(response, BaseException):
+                _LOGGER.warning("%s search failed: %s", tool.source, response)
+                errors[tool.source] = f"Error searching {tool.source}"
+            elif "error" in response:
+                errors[tool.source] = response["error"]
+            else:
+                results[tool.source] = response
+                partial = partial or response.get("partial", False)
+
+        merged = merge_results(query, results)
+        if not merged:
+            if errors and not results:
+                return {"error": "; ".join(errors.values())}
+            return {"result": f"No results found for '{query}' in any source"}
+
+        # Hold the merged results to the largest budget of a single source
+        config_data = {
+            **hass.data[DOMAIN].get("config", {}),
+            **next(iter(hass.config_entries.async_entries(DOMAIN))).options,
+        }
+        chars = share_budget(
+            max(
+                config_data.get(
+                    tool.conf_max_chars, SERVICE_DEFAULTS[tool.conf_max_chars]
+                )
+                for tool in self.tools
+            ),
+            len(merged),
+        )
+        for item in merged:
+            for field in ("summary", "content"):
+                if field in item:
+                    item[field] = trim_text(item[field], chars)
+
+        result: dict[str, Any] = {"results": merged}
+        if errors:
+            result["errors"] = errors
+        if partial:
+            result["partial"] = True
+        return result
+
+
 class Wh40kAPI(llm.API):
     """Warhammer 40k Lore API for LLM integration."""
 
@@ -46,6 +200,10 @@ class Wh40kAPI(llm.API):
             if tool_enabled:
                 tools.append(tool_class())
 
+        # One call searching every source saves a model round trip per source
+        if len(tools) > 1:
+            tools.append(SearchWh40kAllTool(list(tools)))
+
         return tools
 
     async def async_get_api_instance(
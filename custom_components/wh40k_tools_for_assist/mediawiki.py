@@ -0,0 +1,419 @@
+"""Shared client and search tool for MediaWiki based Warhammer 40k wikis."""
+
+import asyncio
+import functools
+import logging
+import re
+import urllib.parse
+from typing import Any
+
+import aiohttp
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import llm
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util.json import JsonObjectType
+
+from .batch import QUERIES_PARAMETER, batch_response, get_queries
+from .budget import share_budget, trim_text
+from .cache import SQLiteCache
+from .const import CONF_RESPONSE_DEADLINE, DOMAIN, SERVICE_DEFAULTS
+from .errors import FetchError, NotFoundError
+from .query import normalize_query
+from .ratelimit import async_request
+
+_LOGGER = logging.getLogger(__name__)
+
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+# Extract fetches in flight, by source and page id, joined by concurrent calls
+_EXTRACTS_INFLIGHT: dict[tuple[str, int], asyncio.Task] = {}
+
+
+class MediaWikiClient:
+    """
+    Async client for the MediaWiki action API of a single wiki.
+
+    Requests time out after REQUEST_TIMEOUT seconds and share the rate limit
+    of the wiki's host with every other client talking to it.
+    """
+
+    REQUEST_TIMEOUT = 10
+    # Longest extract TextExtracts will shorten on the server
+    MAX_EXCHARS = 1200
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        api_url: str,
+        article_url: str,
+        name: str,
+    ) -> None:
+        """Initialize the client."""
+        self._session = session
+        self.api_url = api_url
+        self.article_url = article_url
+        self.name = name
+
+    def page_url(self, title: str) -> str:
+        """Return the URL of an article."""
+        return f"{self.article_url}{urllib.parse.quote(title.replace(' ', '_'))}"
+
+    async def _async_read(self, resp: aiohttp.ClientResponse) -> dict:
+        """Decode a response, raising FetchError for HTTP errors."""
+        if resp.status != 200:
+            _LOGGER.error("%s search received a HTTP %s error", self.name, resp.status)
+            msg = f"{self.name} search error: {resp.status}"
+            raise FetchError(msg)
+        return await resp.json()
+
+    async def async_query(self, **params: Any) -> dict:
+        """Run an ``action=query`` request and return the decoded response."""
+        return await async_request(
+            self._session,
+            self.api_url,
+            self._async_read,
+            request_timeout=self.REQUEST_TIMEOUT,
+            params={"action": "query", "format": "json", **params},
+        )
+
+    def _extract_params(self, chars: int) -> dict[str, Any]:
+        """Return the TextExtracts parameters for intros of about ``chars``."""
+        params: dict[str, Any] = {"prop": "extracts", "exintro": 1, "explaintext": 1}
+        if 0 < chars <= self.MAX_EXCHARS:
+            params["exchars"] = chars
+        return params
+
+    async def async_get_extract(self, pageid: int, chars: int = 0) -> str | None:
+        """Return the plain text intro of an article, None if unavailable."""
+        try:
+            data = await self.async_query(**self._extract_params(chars), pageids=pageid)
+        except Exception as err:
+            _LOGGER.debug("Failed to get full extract for page %s: %s", pageid, err)
+            return None
+        pages = data.get("query", {}).get("pages", {})
+        return pages.get(str(pageid), {}).get("extract") or None
+
+    async def async_get_extracts(
+        self, pageids: list[int], chars: int = 0
+    ) -> dict[int, str]:
+        """
+        Return the plain text intros of articles, keyed by page id.
+
+        Intros longer than ``chars`` are shortened by the wiki when it can,
+        so less text is transferred. All intros are requested at once. When
+        the wiki caps the extracts of one response, the rest are fetched
+        concurrently. Articles without an extract, for example on wikis
+        without the TextExtracts extension, are left out. A failure of the
+        batched request is raised, the separate fetches are best effort.
+        """
+        data = await self.async_query(
+            **self._extract_params(chars),
+            exlimit=len(pageids),
+            pageids="|".join(map(str, pageids)),
+        )
+
+        extracts = {
+            int(pageid): page["extract"]
+            for pageid, page in data.get("query", {}).get("pages", {}).items()
+            if page.get("extract")
+        }
+        if "excontinue" in data.get("continue", {}):
+            missing = [pageid for pageid in pageids if pageid not in extracts]
+            fetched = await asyncio.gather(
+                *(self.async_get_extract(pageid, chars) for pageid in missing)
+            )
+            extracts.update(
+                (pageid, extract)
+                for pageid, extract in zip(missing, fetched, strict=True)
+                if extract
+            )
+        return extracts
+
+    async def async_search(self, query: str, limit: int) -> list[dict]:
+        """
+        Search the wiki and return the title, page, revision and snippet of hits.
+
+        ``list=search`` gives the ranked hits with their snippets, and the same
+        search as a generator adds the latest revision of each page, all in
+        a single request.
+        """
+        search = " ".join(query.split())
+        data = await self.async_query(
+            list="search",
+            srsearch=search,
+            srlimit=limit,
+            generator="search",
+            gsrsearch=search,
+            gsrlimit=limit,
+            prop="info",
+        )
+        search_results = data.get("query", {}).get("search", [])
+        if not search_results:
+            msg = f"No {self.name} articles found for '{query}'"
+            raise NotFoundError(msg)
+
+        pages = data["query"].get("pages", {})
+        return [
+            {
+                "title": result.get("title", ""),
+                "pageid": result.get("pageid", 0),
+                "revid": pages.get(str(result.get("pageid")), {}).get("lastrevid", 0),
+                "snippet": _HTML_TAG_RE.sub("", result.get("snippet", "")),
+            }
+            for result in search_results
+        ]
+
+
+@callback
+def _async_extracts_done(keys: list[tuple[str, int]], task: asyncio.Task) -> None:
+    """Forget a finished extract fetch."""
+    for key in keys:
+        if _EXTRACTS_INFLIGHT.get(key) is task:
+            del _EXTRACTS_INFLIGHT[key]
+
+
+class MediaWikiSearchTool(llm.Tool):
+    """
+    Base tool for searching a MediaWiki based wiki.
+
+    Subclasses describe the wiki with the class attributes below and the
+    ``name``, ``description`` and ``parameters`` of the tool.
+    """
+
+    source: str
+    site_name: str
+    api_url: str
+    article_url: str
+    conf_num_results: str
+    conf_cache_ttl: str
+    conf_max_chars: str
+
+    parameters = vol.Schema(
+        {
+            vol.Required(
+                "query",
+                description="The Warhammer 40k subject to search for",
+            ): str,
+            QUERIES_PARAMETER: [str],
+        }
+    )
+
+    def get_client(self, hass: HomeAssistant) -> MediaWikiClient:
+        """Return a client for the wiki using the shared HTTP session."""
+        return MediaWikiClient(
+            async_get_clientsession(hass),
+            self.api_url,
+            self.article_url,
+            self.site_name,
+        )
+
+    async def async_call(
+        self,
+        hass: HomeAssistant,
+        tool_input: llm.ToolInput,
+        llm_context: llm.LLMContext,
+    ) -> JsonObjectType:
+        """Call the tool."""
+        config_data = hass.data[DOMAIN].get("config", {})
+        entry = next(iter(hass.config_entries.async_entries(DOMAIN)))
+        config_data = {**config_data, **entry.options}
+
+        queries = get_queries(tool_input.tool_args)
+        _LOGGER.info("%s search requested for: %s", self.site_name, queries)
+
+        num_results = config_data.get(self.conf_num_results, 1)
+        ttl = 60 * config_data.get(
+            self.conf_cache_ttl, SERVICE_DEFAULTS[self.conf_cache_ttl]
+        )
+        # Share the response budget between the results of every query
+        chars = share_budget(
+            config_data.get(self.conf_max_chars, SERVICE_DEFAULTS[self.conf_max_chars]),
+            num_results * len(queries),
+        )
+        deadline = asyncio.get_running_loop().time() + config_data.get(
+            CONF_RESPONSE_DEADLINE, SERVICE_DEFAULTS[CONF_RESPONSE_DEADLINE]
+        )
+
+        # Queries of a batch run together, sharing the cache and rate limit
+        client = self.get_client(hass)
+        responses = await asyncio.gather(
+            *(
+                self._async_search(
+                    hass, client, query, num_results, ttl, deadline, chars
+                )
+                for query in queries
+            )
+        )
+        return batch_response(queries, responses)
+
+    async def _async_search(
+        self,
+        hass: HomeAssistant,
+        client: MediaWikiClient,
+        query: str,
+        num_results: int,
+        ttl: int,
+        deadline: float,
+        chars: int,
+    ) -> dict:
+        """Search the wiki for one query and return its response."""
+        # Share entries between spellings of a query and between result counts,
+        # a cached result set serves any request for as many results or fewer
+        cache_params = {"srsearch": normalize_query(query)}
+
+        async def _async_fetch_hits() -> dict:
+            hits = await client.async_search(query, num_results)
+            return {"hits": hits, "limit": num_results}
+
+        try:
+            cache = SQLiteCache()
+            data = await cache.async_get_or_fetch(
+                hass,
+                self.source,
+                cache_params,
+                _async_fetch_hits,
+                ttl,
+                accept=lambda cached: (
+                    "hits" in cached and cached["limit"] >= num_results
+                ),
+                label=cache_params["srsearch"],
+                deadline=deadline,
+            )
+            hits = data["hits"][:num_results]
+            summaries, complete = await self._async_get_summaries(
+                hass, cache, client, hits, ttl, deadline, chars
+            )
+        except NotFoundError as err:
+            return {"result": str(err)}
+        except FetchError as err:
+            return {"error": str(err)}
+        except TimeoutError:
+            _LOGGER.warning("%s search missed the response deadline", self.site_name)
+            return {"error": f"{self.site_name} did not respond in time"}
+        except Exception:
+            _LOGGER.exception("%s search error", self.site_name)
+            return {"error": f"Error searching {self.site_name}"}
+
+        result: dict[str, Any] = {
+            "results": [
+                {
+                    "title": hit["title"],
+                    "summary": trim_text(
+                        summaries.get(hit["pageid"], hit["snippet"]), chars
+                    ),
+                    "url": client.page_url(hit["title"]),
+                }
+                for hit in hits
+            ]
+        }
+        # Stale hits are served when their refresh misses the deadline
+        if data.get("partial") or not complete:
+            result["partial"] = True
+        return result
+
+    async def _async_get_summaries(
+        self,
+        hass: HomeAssistant,
+        cache: SQLiteCache,
+        client: MediaWikiClient,
+        hits: list[dict],
+        ttl: int,
+        deadline: float,
+        chars: int,
+    ) -> tuple[dict[int, str], bool]:
+        """
+        Return the extract of each hit, keyed by page id, and if all arrived.
+
+        Extracts are cached per article and revision, so every query landing
+        on an article shares one copy. Only articles missing from the cache,
+        or edited since, are fetched, shortened to about ``chars`` by the
+        wiki. An extract cached at a shorter length is fetched again for
+        a larger budget. Extract fetches count towards the source's circuit
+        breaker and are skipped while it is open. Calls arriving together
+        join the fetches already in flight for their articles rather than
+        requesting them again. When the fetches are still running at the
+        ``deadline`` (event loop time) the cached extracts are returned and
+        the fetches finish in the background, ready for the next call.
+        """
+        cached = await asyncio.gather(
+            *(cache.async_get(self.source, {"pageid": hit["pageid"]}) for hit in hits)
+        )
+        summaries = {
+            hit["pageid"]: article["extract"]
+            for hit, article in zip(hits, cached, strict=True)
+            if article is not None
+            and article["revid"] == hit["revid"]
+            and not 0 < article.get("chars", 0) < chars
+        }
+        missing = [hit for hit in hits if hit["pageid"] not in summaries]
+        if not missing:
+            return summaries, True
+
+        pending = {
+            hit["pageid"]: task
+            for hit in missing
+            if (task := _EXTRACTS_INFLIGHT.get((self.source, hit["pageid"])))
+        }
+        if to_fetch := [hit for hit in missing if hit["pageid"] not in pending]:
+            if not cache.get_breaker(self.source).allow():
+                _LOGGER.debug("Circuit open for %s, skipping extracts", self.source)
+                return summaries, False
+            task = hass.async_create_background_task(
+                self._async_fetch_summaries(cache, client, to_fetch, ttl, chars),
+                f"{DOMAIN} {self.source} extracts",
+            )
+            keys = [(self.source, hit["pageid"]) for hit in to_fetch]
+            _EXTRACTS_INFLIGHT.update(dict.fromkeys(keys, task))
+            task.add_done_callback(functools.partial(_async_extracts_done, keys))
+            pending.update(dict.fromkeys([hit["pageid"] for hit in to_fetch], task))
+
+        timeout = max(0.0, deadline - asyncio.get_running_loop().time())
+        tasks = set(pending.values())
+        done, _ = await asyncio.wait(tasks, timeout=timeout)
+        for pageid, task in pending.items():
+            if task in done and (extract := task.result().get(pageid)) is not None:
+                summaries[pageid] = extract
+        if len(done) < len(tasks):
+            _LOGGER.debug("%s extracts missed the deadline", self.site_name)
+            return summaries, False
+        return summaries, True
+
+    async def _async_fetch_summaries(
+        self,
+        cache: SQLiteCache,
+        client: MediaWikiClient,
+        hits: list[dict],
+        ttl: int,
+        chars: int,
+    ) -> dict[int, str]:
+        """Fetch and cache the extracts of hits, keyed by page id."""
+        breaker = cache.get_breaker(self.source)
+        try:
+            extracts = await client.async_get_extracts(
+                [hit["pageid"] for hit in hits], chars
+            )
+        except Exception as err:
+            # Also settles a trial fetch let through by a half open breaker
+            breaker.record_failure()
+            _LOGGER.debug("Failed to get %s extracts: %s", self.source, err)
+            return {}
+        breaker.record_success()
+        # Remember how far the wiki shortened the extracts, 0 for not at all
+        limit = chars if chars <= client.MAX_EXCHARS else 0
+        for hit in hits:
+            if (extract := extracts.get(hit["pageid"])) is None:
+                continue
+            await cache.async_set(
+                self.source,
+                {"pageid": hit["pageid"]},
+                {
+                    "title": hit["title"],
+                    "revid": hit["revid"],
+                    "chars": limit,
+                    "extract": extract,
+                },
+                ttl=ttl,
+                label=normalize_query(hit["title"]),
+            )
+        return extracts
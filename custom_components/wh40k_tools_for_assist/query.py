@@ -0,0 +1,32 @@
+"""Search query normalization for WH40k tools."""
+
+import re
+import unicodedata
+
+_APOSTROPHE_RE = re.compile(r"['\u2019]")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]|_")
+# Singular forms ending in these letters are common in names (Horus, Chaos)
+_PLURAL_EXCEPTIONS = ("ss", "us", "is", "os")
+
+
+def _singularize(word: str) -> str:
+    """Strip a simple English plural suffix from a word."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith(_PLURAL_EXCEPTIONS):
+        return word[:-1]
+    return word
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query for use in a cache key.
+
+    Case, whitespace, punctuation and simple plurals are folded so that
+    "Space Marines", "space marine " and "space-marines" share an entry.
+    """
+    query = unicodedata.normalize("NFKC", query).casefold()
+    query = _PUNCTUATION_RE.sub(" ", _APOSTROPHE_RE.sub("", query))
+    return " ".join(_singularize(word) for word in query.split())
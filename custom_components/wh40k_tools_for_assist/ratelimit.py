@@ -0,0 +1,160 @@
+"""Per-host rate limiting and retries for upstream HTTP requests."""
+
+import asyncio
+import logging
+import random
+import time
+import urllib.parse
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import aiohttp
+
+from .errors import FetchError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Requests per second, burst size and concurrent requests allowed per host
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 5
+DEFAULT_MAX_CONCURRENCY = 4
+
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.5
+# Longer Retry-After requests fail the call instead of stalling Assist
+MAX_RETRY_DELAY = 10
+
+# Waits go through a module level name so tests can skip them
+_sleep = asyncio.sleep
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the requests sent to one host.
+
+    Up to ``burst`` requests go out at once, after which they are spaced to
+    ``rate`` per second. ``pause()`` holds back every caller, for
+    example until a ``Retry-After`` has passed. At most ``max_concurrency``
+    requests are in flight at any time.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int) -> None:
+        """Initialize the limiter with a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Tokens go negative to queue callers behind each other
+        self._tokens -= 1
+        return max(0.0, self._paused_until - now) + max(0.0, -self._tokens / self.rate)
+
+    async def async_acquire(self) -> None:
+        """Wait until a request may be sent."""
+        if (delay := self.reserve()) > 0:
+            await _sleep(delay)
+
+    @property
+    def paused_for(self) -> float:
+        """Return the seconds left before the host may be contacted again."""
+        return max(0.0, self._paused_until - time.monotonic())
+
+    def pause(self, delay: float) -> None:
+        """Hold back all requests to the host for ``delay`` seconds."""
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+
+_LIMITERS: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """Return the limiter shared by all requests to the host of ``url``."""
+    host = urllib.parse.urlsplit(url).netloc
+    if (limiter := _LIMITERS.get(host)) is None:
+        limiter = _LIMITERS[host] = RateLimiter(
+            DEFAULT_RATE, DEFAULT_BURST, DEFAULT_MAX_CONCURRENCY
+        )
+    return limiter
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the seconds requested by a ``Retry-After`` header, if valid."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def retry_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Return a jittered exponential backoff, no shorter than ``retry_after``."""
+    backoff = random.uniform(0.5, 1.0) * RETRY_BACKOFF * 2**attempt  # noqa: S311
+    return max(backoff, retry_after or 0.0)
+
+
+async def async_request(
+    session: aiohttp.ClientSession,
+    url: str,
+    read: Callable[[aiohttp.ClientResponse], Awaitable[Any]],
+    *,
+    request_timeout: float,
+    params: dict[str, Any] | None = None,
+    headers: dict[str, str] | None = None,
+    max_retries: int = MAX_RETRIES,
+) -> Any:
+    """
+    Send a rate limited GET request and return what ``read`` makes of it.
+
+    Connection errors, timeouts, server errors and HTTP 429 are retried up to
+    ``max_retries`` times with a jittered exponential backoff that honours
+    ``Retry-After``. A 429 also pauses every other request to the host, and
+    while it is paused for longer than ``MAX_RETRY_DELAY`` requests raise
+    ``FetchError`` at once instead of waiting.
+    Responses that are not retried, including the last attempt, are passed
+    to ``read``, which raises for statuses it does not accept.
+    """
+    limiter = get_rate_limiter(url)
+    client_timeout = aiohttp.ClientTimeout(total=request_timeout)
+    attempt = 0
+    while True:
+        retry = attempt < max_retries
+        if (paused := limiter.paused_for) > MAX_RETRY_DELAY:
+            host = urllib.parse.urlsplit(url).netloc
+            msg = f"{host} asked to pause requests for {paused:.0f} seconds"
+            raise FetchError(msg)
+        await limiter.async_acquire()
+        try:
+            async with (
+                limiter.semaphore,
+                session.get(
+                    url, params=params, headers=headers, timeout=client_timeout
+                ) as resp,
+            ):
+                if resp.status != 429 and resp.status < 500:
+                    return await read(resp)
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                delay = retry_delay(attempt, retry_after)
+                if resp.status == 429:
+                    limiter.pause(delay)
+                if not retry or delay > MAX_RETRY_DELAY:
+                    return await read(resp)
+                _LOGGER.debug("%s returned HTTP %s, retrying", url, resp.status)
+        except (aiohttp.ClientError, TimeoutError) as err:
+            if not retry:
+                raise
+            delay = retry_delay(attempt)
+            _LOGGER.debug("Request to %s failed, retrying: %s", url, err)
+        await _sleep(delay)
+        attempt += 1
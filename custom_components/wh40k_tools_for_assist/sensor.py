@@ -0,0 +1,141 @@
+"""Sensors reporting WH40k tools cache statistics."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from .cache import SourceStats, SQLiteCache
+from .const import (
+    CONF_WH40K_FANDOM_ENABLED,
+    CONF_WH40K_LEXICANUM_ENABLED,
+    CONF_WH40K_WAHAPEDIA_ENABLED,
+    DOMAIN,
+    SOURCE_WH40K_FANDOM,
+    SOURCE_WH40K_LEXICANUM,
+    SOURCE_WH40K_WAHAPEDIA,
+)
+
+# The counters live in memory, polling them is cheap
+SCAN_INTERVAL = timedelta(minutes=1)
+
+# Cache source, the option enabling it and the name of its device
+CACHE_SOURCES = [
+    (SOURCE_WH40K_LEXICANUM, CONF_WH40K_LEXICANUM_ENABLED, "Warhammer 40k Lexicanum"),
+    (SOURCE_WH40K_FANDOM, CONF_WH40K_FANDOM_ENABLED, "Warhammer 40k Fandom Wiki"),
+    (SOURCE_WH40K_WAHAPEDIA, CONF_WH40K_WAHAPEDIA_ENABLED, "Wahapedia"),
+]
+
+
+@dataclass(frozen=True, kw_only=True)
+class Wh40kCacheSensorEntityDescription(SensorEntityDescription):
+    """Describes a cache statistics sensor."""
+
+    value_fn: Callable[[SourceStats], float | None]
+
+
+SENSOR_DESCRIPTIONS = (
+    Wh40kCacheSensorEntityDescription(
+        key="cache_hits",
+        translation_key="cache_hits",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.hits,
+    ),
+    Wh40kCacheSensorEntityDescription(
+        key="cache_misses",
+        translation_key="cache_misses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.misses,
+    ),
+    Wh40kCacheSensorEntityDescription(
+        key="cache_evictions",
+        translation_key="cache_evictions",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.evictions,
+    ),
+    Wh40kCacheSensorEntityDescription(
+        key="cache_expired",
+        translation_key="cache_expired",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda stats: stats.expired,
+    ),
+    Wh40kCacheSensorEntityDescription(
+        key="cache_size",
+        translation_key="cache_size",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        suggested_unit_of_measurement=UnitOfInformation.KILOBYTES,
+        value_fn=lambda stats: stats.size_bytes,
+    ),
+    Wh40kCacheSensorEntityDescription(
+        key="cache_hit_latency",
+        translation_key="cache_hit_latency",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        suggested_display_precision=2,
+        value_fn=lambda stats: stats.hit_latency,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up cache statistics sensors for the enabled sources."""
+    config_data = {**entry.data, **entry.options}
+    cache = SQLiteCache()
+    async_add_entities(
+        Wh40kCacheSensor(entry, cache, source, name, description)
+        for source, conf_enabled, name in CACHE_SOURCES
+        if config_data.get(conf_enabled)
+        for description in SENSOR_DESCRIPTIONS
+    )
+
+
+class Wh40kCacheSensor(SensorEntity):
+    """Cache statistic for a single source."""
+
+    entity_description: Wh40kCacheSensorEntityDescription
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        cache: SQLiteCache,
+        source: str,
+        name: str,
+        description: Wh40kCacheSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._cache = cache
+        self._source = source
+        self._attr_unique_id = f"{entry.entry_id}_{source}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry.entry_id}_{source}")},
+            name=name,
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the current value of the statistic."""
+        return self.entity_description.value_fn(
+            self._cache.get_source_stats(self._source)
+        )
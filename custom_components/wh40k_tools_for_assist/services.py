@@ -0,0 +1,201 @@
+"""Services for administering the WH40k tools cache."""
+
+import logging
+from pathlib import Path
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .cache import SQLiteCache
+from .const import (
+    ATTR_FACTION,
+    ATTR_PATH,
+    ATTR_QUERY,
+    ATTR_SOURCE,
+    CACHE_SNAPSHOT_FILENAME,
+    DOMAIN,
+    SERVICE_CLEAR_CACHE,
+    SERVICE_EXPORT_CACHE,
+    SERVICE_IMPORT_CACHE,
+    SERVICE_INVALIDATE_CACHE,
+    SOURCE_WH40K_FANDOM,
+    SOURCE_WH40K_LEXICANUM,
+    SOURCE_WH40K_WAHAPEDIA,
+)
+from .query import normalize_query
+from .wh40k_wahapedia import normalize_faction_name
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_SCHEMA = vol.Schema({vol.Optional(ATTR_PATH): cv.string})
+
+SOURCES = [SOURCE_WH40K_LEXICANUM, SOURCE_WH40K_FANDOM, SOURCE_WH40K_WAHAPEDIA]
+WIKI_SOURCES = [SOURCE_WH40K_LEXICANUM, SOURCE_WH40K_FANDOM]
+
+CLEAR_CACHE_SCHEMA = vol.Schema({vol.Optional(ATTR_SOURCE): vol.In(SOURCES)})
+
+INVALIDATE_CACHE_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_SOURCE): vol.In(SOURCES),
+            vol.Exclusive(ATTR_FACTION, "label"): cv.string,
+            vol.Exclusive(ATTR_QUERY, "label"): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_SOURCE, ATTR_FACTION, ATTR_QUERY),
+)
+
+
+def get_snapshot_path(hass: HomeAssistant) -> Path:
+    """Return the snapshot file that is merged into the cache at startup."""
+    return Path(hass.config.path(STORAGE_DIR, DOMAIN, CACHE_SNAPSHOT_FILENAME))
+
+
+async def _async_resolve_path(hass: HomeAssistant, call: ServiceCall) -> Path:
+    """Return the snapshot path for a service call."""
+    _async_check_loaded(hass)
+    if ATTR_PATH not in call.data:
+        return get_snapshot_path(hass)
+
+    path = Path(hass.config.path(call.data[ATTR_PATH]))
+    # Resolves the path on disk
+    if not await hass.async_add_executor_job(hass.config.is_allowed_path, str(path)):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="path_not_allowed",
+            translation_placeholders={"path": str(path)},
+        )
+    return path
+
+
+@callback
+def _async_check_loaded(hass: HomeAssistant) -> None:
+    """Raise if the integration has no loaded config entry."""
+    if not hass.config_entries.async_loaded_entries(DOMAIN):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN, translation_key="not_loaded"
+        )
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the cache administration services."""
+
+    async def _async_export_cache(call: ServiceCall) -> ServiceResponse:
+        path = await _async_resolve_path(hass, call)
+        try:
+            entries = await SQLiteCache().async_export_snapshot(path)
+        except OSError as err:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="snapshot_failed",
+                translation_placeholders={"path": str(path), "error": str(err)},
+            ) from err
+        return {"path": str(path), "entries": entries}
+
+    async def _async_import_cache(call: ServiceCall) -> ServiceResponse:
+        path = await _async_resolve_path(hass, call)
+        try:
+            entries = await SQLiteCache().async_import_snapshot(path)
+        except ValueError as err:
+            raise HomeAssistantError(
+                translation_domain=DOMAIN,
+                translation_key="snapshot_failed",
+                translation_placeholders={"path": str(path), "error": str(err)},
+            ) from err
+        return {"path": str(path), "entries": entries}
+
+    async def _async_clear_cache(call: ServiceCall) -> ServiceResponse:
+        _async_check_loaded(hass)
+        deleted = await SQLiteCache().async_invalidate(call.data.get(ATTR_SOURCE))
+        return {"deleted": deleted}
+
+    async def _async_invalidate_cache(call: ServiceCall) -> ServiceResponse:
+        _async_check_loaded(hass)
+        source = call.data.get(ATTR_SOURCE)
+        label = pattern = None
+        if ATTR_FACTION in call.data:
+            # Faction pages are labelled with their slug and only on Wahapedia
+            if source not in (None, SOURCE_WH40K_WAHAPEDIA):
+                raise ServiceValidationError(
+                    translation_domain=DOMAIN,
+                    translation_key="faction_source",
+                    translation_placeholders={"source": source},
+                )
+            label = normalize_faction_name(call.data[ATTR_FACTION])
+            if label is None:
+                raise ServiceValidationError(
+                    translation_domain=DOMAIN,
+                    translation_key="unknown_faction",
+                    translation_placeholders={"faction": call.data[ATTR_FACTION]},
+                )
+            source = SOURCE_WH40K_WAHAPEDIA
+        if ATTR_QUERY not in call.data:
+            deleted = await SQLiteCache().async_invalidate(source, label)
+            return {"deleted": deleted}
+
+        # Wiki searches and articles are labelled with their normalized query
+        # or title, purged one source at a time to use the label index
+        pattern = normalize_query(call.data[ATTR_QUERY])
+        if not pattern:
+            # An empty prefix would match every wiki entry
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="empty_query",
+                translation_placeholders={"query": call.data[ATTR_QUERY]},
+            )
+        deleted = 0
+        for wiki in [source] if source else WIKI_SOURCES:
+            deleted += await SQLiteCache().async_invalidate(wiki, pattern=pattern)
+        return {"deleted": deleted}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_CACHE,
+        _async_export_cache,
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_CACHE,
+        _async_import_cache,
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CLEAR_CACHE,
+        _async_clear_cache,
+        schema=CLEAR_CACHE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_INVALIDATE_CACHE,
+        _async_invalidate_cache,
+        schema=INVALIDATE_CACHE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+
+async def async_import_startup_snapshot(hass: HomeAssistant) -> None:
+    """Merge the startup snapshot into the cache if one has been provided."""
+    path = get_snapshot_path(hass)
+    if not await hass.async_add_executor_job(path.exists):
+        return
+    try:
+        entries = await SQLiteCache().async_import_snapshot(path)
+    except ValueError:
+        _LOGGER.exception("Failed to import cache snapshot %s", path)
+        return
+    _LOGGER.info("Warmed cache with %d entries from %s", entries, path)
@@ -1,25 +1,18 @@
 """Tool for searching Warhammer 40k Lexicanum."""
 
-import logging
-import re
-import urllib.parse
-
 import voluptuous as vol
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import llm
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.util.json import JsonObjectType
 
-from .cache import SQLiteCache
+from .batch import QUERIES_PARAMETER
 from .const import (
+    CONF_WH40K_LEXICANUM_CACHE_TTL,
+    CONF_WH40K_LEXICANUM_MAX_CHARS,
     CONF_WH40K_LEXICANUM_NUM_RESULTS,
-    DOMAIN,
+    SOURCE_WH40K_LEXICANUM,
 )
-
-_LOGGER = logging.getLogger(__name__)
+from .mediawiki import MediaWikiSearchTool
 
 
-class SearchWh40kLexicanumTool(llm.Tool):
+class SearchWh40kLexicanumTool(MediaWikiSearchTool):
     """Tool for searching Warhammer 40k Lexicanum."""
 
     name = "search_wh40k_lexicanum"
@@ -31,111 +24,14 @@ class SearchWh40kLexicanumTool(llm.Tool):
                 "query",
                 description="The Warhammer 40k subject to search for (e.g., 'Space Marines', 'Emperor of Mankind', 'Horus Heresy')",
             ): str,
+            QUERIES_PARAMETER: [str],
         }
     )
 
-    async def async_call(
-        self,
-        hass: HomeAssistant,
-        tool_input: llm.ToolInput,
-        llm_context: llm.LLMContext,
-    ) -> JsonObjectType:
-        """Call the tool."""
-        config_data = hass.data[DOMAIN].get("config", {})
-        entry = next(iter(hass.config_entries.async_entries(DOMAIN)))
-        config_data = {**config_data, **entry.options}
-
-        query = tool_input.tool_args["query"]
-        _LOGGER.info("Warhammer 40k Lexicanum search requested for: %s", query)
-
-        num_results = config_data.get(CONF_WH40K_LEXICANUM_NUM_RESULTS, 1)
-
-        try:
-            session = async_get_clientsession(hass)
-
-            # First, search for pages
-            search_params = {
-                "action": "query",
-                "format": "json",
-                "list": "search",
-                "srsearch": query,
-                "srlimit": num_results,
-            }
-
-            cache = SQLiteCache()
-            cached_response = cache.get(__name__, search_params)
-            if cached_response:
-                return cached_response
-
-            async with session.get(
-                "https://wh40k.lexicanum.com/w/api.php",
-                params=search_params,
-            ) as resp:
-                if resp.status != 200:
-                    _LOGGER.error(
-                        "Warhammer 40k Lexicanum search received a HTTP %s error",
-                        resp.status,
-                    )
-                    return {
-                        "error": f"Warhammer 40k Lexicanum search error: {resp.status}"
-                    }
-
-                search_data = await resp.json()
-                search_results = search_data.get("query", {}).get("search", [])
-
-                if not search_results:
-                    return {
-                        "result": f"No Warhammer 40k Lexicanum articles found for '{query}'"
-                    }
-
-                # Get full content for each result
-                results = []
-                for result in search_results:
-                    title = result.get("title", "")
-                    snippet = result.get("snippet", "")
-
-                    # Clean HTML tags from snippet
-                    snippet = re.sub(r"<[^>]+>", "", snippet)
-
-                    # Try to get extract from page
-                    content_params = {
-                        "action": "query",
-                        "format": "json",
-                        "prop": "extracts",
-                        "exintro": True,
-                        "explaintext": True,
-                        "titles": title,
-                    }
-
-                    try:
-                        async with session.get(
-                            "https://wh40k.lexicanum.com/w/api.php",
-                            params=content_params,
-                        ) as content_resp:
-                            if content_resp.status == 200:
-                                content_data = await content_resp.json()
-                                pages = content_data.get("query", {}).get("pages", {})
-                                # Get the first (and only) page from the response
-                                page_data = next(iter(pages.values()), {})
-                                extract = page_data.get("extract", snippet)
-                            else:
-                                extract = snippet
-                    except Exception as e:
-                        _LOGGER.debug("Failed to get full extract for %s: %s", title, e)
-                        extract = snippet
-
-                    # Create the article URL
-                    article_url = f"https://wh40k.lexicanum.com/wiki/{urllib.parse.quote(title.replace(' ', '_'))}"
-
-                    results.append(
-                        {"title": title, "summary": extract, "url": article_url}
-                    )
-
-                if results:
-                    cache.set(__name__, search_params, {"results": results})
-
-                return {"results": results}
-
-        except Exception:
-            _LOGGER.exception("Warhammer 40k Lexicanum search error")
-            return {"error": "Error searching Warhammer 40k Lexicanum"}
+    source = SOURCE_WH40K_LEXICANUM
+    site_name = "Warhammer 40k Lexicanum"
+    api_url = "https://wh40k.lexicanum.com/w/api.php"
+    article_url = "https://wh40k.lexicanum.com/wiki/"
+    conf_num_results = CONF_WH40K_LEXICANUM_NUM_RESULTS
+    conf_cache_ttl = CONF_WH40K_LEXICANUM_CACHE_TTL
+    conf_max_chars = CONF_WH40K_LEXICANUM_MAX_CHARS
@@ -1,7 +1,11 @@
 """Tool for searching Warhammer 40k rules on Wahapedia."""
 
+import asyncio
+import functools
 import logging
+from typing import Any
 
+import aiohttp
 import voluptuous as vol
 from bs4 import BeautifulSoup
 from homeassistant.core import HomeAssistant
@@ -9,20 +13,26 @@ from homeassistant.helpers import llm
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.util.json import JsonObjectType
 
+from .batch import QUERIES_PARAMETER, batch_response, get_queries
+from .budget import share_budget, trim_text
 from .cache import SQLiteCache
 from .const import (
+    CONF_RESPONSE_DEADLINE,
+    CONF_WH40K_WAHAPEDIA_CACHE_TTL,
+    CONF_WH40K_WAHAPEDIA_MAX_CHARS,
     CONF_WH40K_WAHAPEDIA_NUM_RESULTS,
     DOMAIN,
+    SERVICE_DEFAULTS,
+    SOURCE_WH40K_WAHAPEDIA,
     WAHAPEDIA_FACTION_URL_TEMPLATE,
     WAHAPEDIA_FACTIONS,
     WAHAPEDIA_RULES_URLS,
 )
+from .errors import FetchError
+from .ratelimit import async_request
 
 _LOGGER = logging.getLogger(__name__)
 
-# Cache TTL for rules content (24 hours in seconds)
-CACHE_TTL_SECONDS = 86400
-
 
 def normalize_faction_name(faction: str) -> str | None:
     """
@@ -104,6 +114,64 @@ def extract_sections_from_html(html: str, source_url: str) -> list[dict]:
     return sections
 
 
+async def _async_read_page(resp: aiohttp.ClientResponse) -> dict | None:
+    """
+    Return the HTML and validators of a Wahapedia page, None if not modified.
+
+    Raises FetchError for HTTP errors.
+    """
+    if resp.status == 304:
+        return None
+    if resp.status != 200:
+        _LOGGER.warning("Wahapedia returned HTTP %s for %s", resp.status, resp.url)
+        msg = f"Wahapedia returned HTTP {resp.status} for {resp.url}"
+        raise FetchError(msg)
+    return {
+        "html": await resp.text(),
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }
+
+
+async def async_fetch_page(
+    hass: HomeAssistant,
+    session: aiohttp.ClientSession,
+    url: str,
+    cached: dict | None = None,
+) -> dict:
+    """
+    Download a Wahapedia page and extract its sections.
+
+    With a ``cached`` page the request is conditional on its ETag and
+    Last-Modified validators. If Wahapedia reports the page unchanged the
+    cached page itself is returned, without downloading or parsing it again.
+    Pages are parsed in the executor.
+    """
+    headers = {}
+    if cached is not None:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    page = await async_request(
+        session, url, _async_read_page, request_timeout=30, headers=headers or None
+    )
+    if page is None:
+        if cached is None:
+            msg = f"Wahapedia returned HTTP 304 for {url}"
+            raise FetchError(msg)
+        _LOGGER.debug("%s not modified, keeping cached sections", url)
+        return cached
+    sections = await hass.async_add_executor_job(
+        extract_sections_from_html, page["html"], url
+    )
+    return {
+        "sections": sections,
+        "etag": page["etag"],
+        "last_modified": page["last_modified"],
+    }
+
+
 def search_sections(sections: list[dict], query: str, num_results: int) -> list[dict]:
     """Search sections for query matches, prioritizing title matches."""
     query_lower = query.lower()
@@ -136,6 +204,9 @@ class SearchWh40kWahapediaTool(llm.Tool):
         "faction-specific rules like army rules, detachments, stratagems, and enhancements."
     )
 
+    source = SOURCE_WH40K_WAHAPEDIA
+    conf_max_chars = CONF_WH40K_WAHAPEDIA_MAX_CHARS
+
     parameters = vol.Schema(
         {
             vol.Required(
@@ -143,6 +214,7 @@ class SearchWh40kWahapediaTool(llm.Tool):
                 description="The rule, ability, phase, or keyword to search for "
                 "(e.g., 'shooting phase', 'stratagems', 'mortal wounds')",
             ): str,
+            QUERIES_PARAMETER: [str],
             vol.Optional(
                 "faction",
                 description="Optional faction name to search faction-specific rules "
@@ -162,15 +234,24 @@ class SearchWh40kWahapediaTool(llm.Tool):
         entry = next(iter(hass.config_entries.async_entries(DOMAIN)))
         config_data = {**config_data, **entry.options}
 
-        query = tool_input.tool_args["query"]
+        queries = get_queries(tool_input.tool_args)
         faction_input = tool_input.tool_args.get("faction")
         num_results = config_data.get(CONF_WH40K_WAHAPEDIA_NUM_RESULTS, 3)
+        ttl = 60 * config_data.get(
+            CONF_WH40K_WAHAPEDIA_CACHE_TTL,
+            SERVICE_DEFAULTS[CONF_WH40K_WAHAPEDIA_CACHE_TTL],
+        )
+        deadline = asyncio.get_running_loop().time() + config_data.get(
+            CONF_RESPONSE_DEADLINE, SERVICE_DEFAULTS[CONF_RESPONSE_DEADLINE]
+        )
 
         _LOGGER.info(
-            "Wahapedia search requested for: %s (faction: %s)", query, faction_input
+            "Wahapedia search requested for: %s (faction: %s)", queries, faction_input
         )
 
         cache = SQLiteCache()
+        partial = False
+        errors: list[str] = []
 
         try:
             session = async_get_clientsession(hass)
@@ -192,51 +273,103 @@ class SearchWh40kWahapediaTool(llm.Tool):
             else:
                 urls = WAHAPEDIA_RULES_URLS
 
-            # Fetch and parse each URL
-            for source_name, url in urls.items():
-                cache_key = f"wahapedia_{source_name}"
-
-                # Check cache first
-                cached_sections = cache.get(
-                    cache_key, {"url": url}, max_age=CACHE_TTL_SECONDS
+            async def _async_get_page(label: str, url: str) -> dict:
+                return await cache.async_get_or_fetch(
+                    hass,
+                    SOURCE_WH40K_WAHAPEDIA,
+                    {"url": url},
+                    functools.partial(async_fetch_page, hass, session, url),
+                    ttl,
+                    label=label,
+                    revalidate=functools.partial(async_fetch_page, hass, session, url),
+                    deadline=deadline,
                 )
-                if cached_sections:
-                    all_sections.extend(cached_sections.get("sections", []))
-                    continue
-
-                # Fetch the page
-                try:
-                    async with session.get(url, timeout=30) as resp:
-                        if resp.status != 200:
-                            _LOGGER.warning(
-                                "Wahapedia returned HTTP %s for %s", resp.status, url
-                            )
-                            continue
-
-                        html = await resp.text()
-                        sections = extract_sections_from_html(html, url)
-
-                        # Cache the parsed sections
-                        cache.set(cache_key, {"url": url}, {"sections": sections})
-                        all_sections.extend(sections)
-
-                except Exception as e:
-                    _LOGGER.warning("Failed to fetch %s: %s", url, e)
-                    continue
+
+            # Fetch and parse the URLs together, served from the cache when possible
+            pages = await asyncio.gather(
+                *(_async_get_page(label, url) for label, url in urls.items()),
+                return_exceptions=True,
+            )
+            for url, page in zip(urls.values(), pages, strict=True):
+                if isinstance(page, TimeoutError):
+                    _LOGGER.debug("Skipping %s: missed the response deadline", url)
+                    partial = True
+                elif isinstance(page, FetchError):
+                    # Includes an open circuit breaker and cached failures
+                    _LOGGER.debug("Skipping %s: %s", url, page)
+                    errors.append(str(page))
+                elif isinstance(page, BaseException):
+                    _LOGGER.warning("Failed to fetch %s: %s", url, page)
+                    errors.append(f"Error fetching {url}")
+                else:
+                    # Stale pages are served when their refresh fails or misses
+                    # the deadline
+                    partial = partial or page.get("partial", False)
+                    all_sections.extend(page.get("sections", []))
 
         except Exception:
             _LOGGER.exception("Wahapedia search error")
             return {"error": "Error searching Wahapedia"}
 
         if not all_sections:
+            # Pages that could not be fetched are unavailable, not empty
+            if partial:
+                errors.append("Wahapedia did not respond in time")
+            if errors:
+                return {"error": "; ".join(dict.fromkeys(errors))}
             source = faction_input if faction_input else "core rules"
             return {"result": f"No content found for {source}"}
+        # The pages that failed may hold the answer
+        partial = partial or bool(errors)
+
+        # Every query of a batch searches the same pages, sharing the response
+        # budget between the queries and then between their sections
+        max_chars = share_budget(
+            config_data.get(self.conf_max_chars, SERVICE_DEFAULTS[self.conf_max_chars]),
+            len(queries),
+        )
+        responses = [
+            self._search_response(
+                all_sections,
+                query,
+                num_results,
+                max_chars,
+                faction_input or "core rules",
+                partial=partial,
+                errors=list(dict.fromkeys(errors)),
+            )
+            for query in queries
+        ]
+        return batch_response(queries, responses)
 
-        # Search the sections
-        results = search_sections(all_sections, query, num_results)
-
+    def _search_response(
+        self,
+        sections: list[dict],
+        query: str,
+        num_results: int,
+        max_chars: int,
+        source: str,
+        *,
+        partial: bool,
+        errors: list[str],
+    ) -> dict:
+        """Search the sections for one query and return its response."""
+        results = search_sections(sections, query, num_results)
+
+        result: dict[str, Any]
         if not results:
-            source = faction_input if faction_input else "core rules"
-            return {"result": f"No matches found for '{query}' in {source}"}
-
-        return {"results": results}
+            result = {"result": f"No matches found for '{query}' in {source}"}
+        else:
+            # Leave the cached sections untouched
+            chars = share_budget(max_chars, len(results))
+            result = {
+                "results": [
+                    {**section, "content": trim_text(section["content"], chars)}
+                    for section in results
+                ]
+            }
+        if errors:
+            result["errors"] = errors
+        if partial:
+            result["partial"] = True
+        return result
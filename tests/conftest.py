@@ -1,5 +1,8 @@
 """Test configuration for WH40k Tools for Assist integration."""
 
+import asyncio
+from collections.abc import AsyncGenerator, Callable
+from pathlib import Path
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock
 
@@ -7,6 +10,7 @@ import pytest
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
+from custom_components.wh40k_tools_for_assist.cache import SQLiteCache
 from custom_components.wh40k_tools_for_assist.const import (
     CONF_WH40K_FANDOM_ENABLED,
     CONF_WH40K_FANDOM_NUM_RESULTS,
@@ -19,15 +23,61 @@ from custom_components.wh40k_tools_for_assist.const import (
 
 
 @pytest.fixture
-def mock_hass() -> MagicMock:
+def mock_hass(tmp_path: Path) -> MagicMock:
     """Create a mock HomeAssistant instance."""
     hass = MagicMock(spec=HomeAssistant)
     hass.data = {}
+    hass.config = MagicMock()
+    hass.config.path = MagicMock(
+        side_effect=lambda *parts: str(tmp_path.joinpath(*parts))
+    )
     hass.config_entries = MagicMock()
+    hass.config_entries.async_forward_entry_setups = AsyncMock()
+    hass.config_entries.async_unload_platforms = AsyncMock(return_value=True)
+    hass.bus = MagicMock()
+    hass.services = MagicMock()
     hass.async_create_task = AsyncMock()
+    hass.async_add_executor_job = AsyncMock(
+        side_effect=lambda target, *args: target(*args)
+    )
+    hass.async_create_background_task = MagicMock(
+        side_effect=lambda target, *_, **__: asyncio.ensure_future(target)
+    )
     return hass
 
 
+@pytest.fixture
+async def cache(tmp_path: Path) -> AsyncGenerator[SQLiteCache]:
+    """Create a fresh cache instance backed by a temporary database."""
+    SQLiteCache._instance = None  # noqa: SLF001
+    cache = SQLiteCache()
+    cache.configure(tmp_path / "cache.db")
+    yield cache
+    await cache.async_shutdown()
+
+
+@pytest.fixture
+def mock_response() -> Callable[..., MagicMock]:
+    """Return a factory of mock responses usable as async context managers."""
+
+    def _response(
+        status: int,
+        *,
+        headers: dict[str, str] | None = None,
+        json: dict[str, Any] | None = None,
+        text: str = "",
+    ) -> MagicMock:
+        resp = MagicMock(status=status, headers=headers or {})
+        resp.json = AsyncMock(return_value=json or {})
+        resp.text = AsyncMock(return_value=text)
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=resp)
+        context.__aexit__ = AsyncMock(return_value=None)
+        return context
+
+    return _response
+
+
 @pytest.fixture
 def mock_config_entry() -> MagicMock:
     """Create a mock ConfigEntry with all tools enabled."""
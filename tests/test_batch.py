@@ -0,0 +1,26 @@
+"""Test the query batch helpers."""
+
+from custom_components.wh40k_tools_for_assist.batch import (
+    MAX_QUERIES,
+    batch_response,
+    get_queries,
+)
+
+
+def test_get_queries() -> None:
+    """Test the main query comes first and repeats are dropped."""
+    assert get_queries({"query": "Horus"}) == ["Horus"]
+    assert get_queries({"query": "Horus", "queries": ["Lion", "Horus"]}) == [
+        "Horus",
+        "Lion",
+    ]
+    queries = [f"Primarch {number}" for number in range(20)]
+    assert len(get_queries({"query": "Horus", "queries": queries})) == MAX_QUERIES
+
+
+def test_batch_response() -> None:
+    """Test a single query keeps its response and a batch is keyed by query."""
+    assert batch_response(["Horus"], [{"result": "None"}]) == {"result": "None"}
+    assert batch_response(["Horus", "Lion"], [{"error": "a"}, {"error": "b"}]) == {
+        "results": {"Horus": {"error": "a"}, "Lion": {"error": "b"}}
+    }
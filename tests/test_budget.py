@@ -0,0 +1,29 @@
+"""Test the response size budget helpers."""
+
+import pytest
+
+from custom_components.wh40k_tools_for_assist.budget import share_budget, trim_text
+
+
+@pytest.mark.parametrize(
+    ("text", "max_chars", "expected"),
+    [
+        ("Short enough.", 20, "Short enough."),
+        ("The Emperor sits. Upon the Golden Throne of Terra.", 30, "The Emperor sits."),
+        ("The Emperor sits upon the Golden Throne", 22, "The Emperor sits upon…"),
+        ("Supercalifragilistic", 8, "Superca…"),
+    ],
+)
+def test_trim_text(text: str, max_chars: int, expected: str) -> None:
+    """Test text is cut at sentence or word boundaries within the budget."""
+    trimmed = trim_text(text, max_chars)
+
+    assert trimmed == expected
+    assert len(trimmed) <= max_chars
+
+
+def test_share_budget() -> None:
+    """Test a budget is split evenly and never drops to zero."""
+    assert share_budget(1500, 3) == 500
+    assert share_budget(1500, 0) == 1500
+    assert share_budget(2, 5) == 1
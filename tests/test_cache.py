@@ -0,0 +1,743 @@
+"""Test the WH40k tools SQLite cache."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.wh40k_tools_for_assist import codec
+from custom_components.wh40k_tools_for_assist.cache import (
+    SCHEMA_VERSION,
+    CachedFailure,
+    MemoryCache,
+    SQLiteCache,
+)
+from custom_components.wh40k_tools_for_assist.errors import FetchError, NotFoundError
+
+FAR_FUTURE = 2**40
+
+
+async def _drain_worker(cache: SQLiteCache) -> None:
+    """Let pending tasks queue their lookups, then wait for them to finish."""
+    await asyncio.sleep(0)
+    await cache._async_run(time.time)  # noqa: SLF001
+
+
+class TestSQLiteCache:
+    """Test the SQLite cache."""
+
+    async def test_async_set_and_get(self, cache: SQLiteCache) -> None:
+        """Test a stored value can be read back."""
+        await cache.async_set("tool", {"q": "Horus"}, {"results": [1, 2]})
+
+        assert await cache.async_get("tool", {"q": "Horus"}) == {"results": [1, 2]}
+        assert await cache.async_get("tool", {"q": "Sanguinius"}) is None
+
+    async def test_runs_on_worker_thread(
+        self, cache: SQLiteCache, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test database access never happens on the event loop thread."""
+        threads = []
+        original_read = SQLiteCache._read  # noqa: SLF001
+
+        def _read(self: SQLiteCache, *args: Any) -> Any:
+            threads.append(threading.current_thread())
+            return original_read(self, *args)
+
+        monkeypatch.setattr(SQLiteCache, "_read", _read)
+        await cache.async_get("tool", None)
+
+        assert threads
+        assert threads[0] is not threading.current_thread()
+
+    async def test_memory_tier_serves_hits(self, cache: SQLiteCache) -> None:
+        """Test written values are served from memory without the database."""
+        await cache.async_set("tool", {"q": "Horus"}, {"value": 1})
+        await cache.async_close()
+
+        # Reopening clears the memory tier, so the first read comes from disk
+        assert await cache.async_get("tool", {"q": "Horus"}) == {"value": 1}
+        assert cache.disk_stats.hits == 1
+        assert await cache.async_get("tool", {"q": "Horus"}) == {"value": 1}
+        assert cache.memory.stats.hits == 1
+        assert cache.disk_stats.hits == 1
+
+    def test_memory_tier_bounds(self) -> None:
+        """Test the memory tier evicts least recently used entries."""
+        memory = MemoryCache(max_entries=2, max_bytes=100)
+        memory.put("a", 1, 0, FAR_FUTURE, 10)
+        memory.put("b", 2, 0, FAR_FUTURE, 10)
+        assert memory.get("a", 0) == 1
+        memory.put("c", 3, 0, FAR_FUTURE, 10)
+
+        assert memory.get("b", 0) is None
+        assert memory.get("a", 0) == 1
+
+        memory.put("d", 4, 0, FAR_FUTURE, 95)
+        assert len(memory) == 1
+        assert memory.size_bytes == 95
+
+        memory.put("e", 5, 0, FAR_FUTURE, 101)
+        assert memory.get("e", 0) is None
+
+    def test_memory_tier_respects_cutoff(self) -> None:
+        """Test old or expired entries are not served from memory."""
+        memory = MemoryCache(max_entries=2, max_bytes=100)
+        memory.put("a", 1, 10, FAR_FUTURE, 10)
+        memory.put("b", 2, 10, 0, 10)
+
+        assert memory.get("a", 11) is None
+        assert memory.get_entry("a", 0) == (1, 10)
+        assert memory.get("b", 0) is None
+        assert len(memory) == 1
+
+    async def test_expired_entries_ignored_and_swept(self, cache: SQLiteCache) -> None:
+        """Test reads skip expired rows and the sweeper deletes them."""
+        await cache.async_set("tool", {"q": "old"}, {"value": 1}, ttl=0)
+        await cache.async_set("tool", {"q": "new"}, {"value": 2}, ttl=3600)
+
+        assert await cache.async_get("tool", {"q": "old"}) is None
+        assert await cache.async_sweep() == 1
+        assert await cache.async_get("tool", {"q": "new"}) == {"value": 2}
+
+    async def test_evicts_least_recently_accessed(self, cache: SQLiteCache) -> None:
+        """Test the sweeper evicts by last access once over the size cap."""
+        now = int(time.time())
+        data = {"value": "x" * 100}
+        for age, name in ((30, "a"), (20, "b"), (10, "c")):
+            await cache._async_run(  # noqa: SLF001
+                cache.set, "tool", {"q": name}, data, now - age, 3600
+            )
+        cache.memory.clear()
+
+        # Reading "a" makes "b" the least recently accessed entry
+        assert await cache.async_get("tool", {"q": "a"}) == data
+        cache.max_bytes = 250
+        await cache.async_sweep()
+        cache.memory.clear()
+
+        assert cache.evictions == 1
+        assert await cache.async_get("tool", {"q": "a"}) == data
+        assert await cache.async_get("tool", {"q": "b"}) is None
+        assert await cache.async_get("tool", {"q": "c"}) == data
+
+    async def test_set_evicts_when_over_size_cap(self, cache: SQLiteCache) -> None:
+        """Test flushes past the size cap evict without waiting for a sweep."""
+        cache.max_bytes = 250
+        for name in ("a", "b", "c"):
+            await cache.async_set("tool", {"q": name}, {"value": "x" * 100})
+            await cache.async_flush()
+
+        assert cache.evictions == 1
+        cache.memory.clear()
+        assert await cache.async_get("tool", {"q": "a"}) is None
+        assert await cache.async_get("tool", {"q": "c"}) is not None
+
+    async def test_get_or_fetch_caches_result(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test fetch is only called on a miss."""
+        fetch = AsyncMock(return_value={"value": 1})
+
+        for _ in range(2):
+            assert await cache.async_get_or_fetch(
+                mock_hass, "tool", None, fetch, 60
+            ) == {"value": 1}
+
+        fetch.assert_awaited_once()
+
+    async def test_get_or_fetch_coalesces_concurrent_misses(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test concurrent identical lookups share a single fetch."""
+        release = asyncio.Event()
+
+        async def _fetch() -> dict:
+            await release.wait()
+            return {"value": 1}
+
+        fetch = AsyncMock(side_effect=_fetch)
+        callers = [
+            asyncio.create_task(
+                cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+            )
+            for _ in range(3)
+        ]
+        await _drain_worker(cache)
+        release.set()
+
+        assert await asyncio.gather(*callers) == [{"value": 1}] * 3
+        fetch.assert_awaited_once()
+        assert cache.coalesced == 2
+
+    async def test_get_or_fetch_shares_failures(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test a failed shared fetch is raised to every waiter and not reused."""
+        release = asyncio.Event()
+
+        async def _fetch() -> dict:
+            await release.wait()
+            msg = "boom"
+            raise FetchError(msg)
+
+        fetch = AsyncMock(side_effect=_fetch)
+        callers = [
+            asyncio.create_task(
+                cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+            )
+            for _ in range(2)
+        ]
+        await _drain_worker(cache)
+        release.set()
+
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, FetchError) for result in results)
+        fetch.assert_awaited_once()
+
+        fetch.side_effect = None
+        fetch.return_value = {"value": 2}
+        assert await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60) == {
+            "value": 2
+        }
+
+    async def test_get_or_fetch_does_not_cache_errors(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test a failing fetch is not cached."""
+        fetch = AsyncMock(side_effect=FetchError("boom"))
+
+        with pytest.raises(FetchError):
+            await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+        assert await cache.async_get("tool", None) is None
+
+    async def test_get_or_fetch_caches_failures(
+        self, cache: SQLiteCache, tmp_path: Path, mock_hass: MagicMock
+    ) -> None:
+        """Test failures are remembered as negative entries when enabled."""
+        cache.configure(tmp_path / "cache.db", negative_ttl=60)
+        msg = "No articles found"
+        fetch = AsyncMock(side_effect=NotFoundError(msg))
+
+        for _ in range(2):
+            with pytest.raises(NotFoundError, match=msg):
+                await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+
+        fetch.assert_awaited_once()
+        assert cache.negative_hits == 1
+        assert await cache.async_get("tool", None) is None
+
+        # Negative entries survive the memory tier being dropped
+        cache.memory.clear()
+        with pytest.raises(NotFoundError, match=msg):
+            await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+        fetch.assert_awaited_once()
+
+    async def test_get_or_fetch_caches_timeouts(
+        self, cache: SQLiteCache, tmp_path: Path, mock_hass: MagicMock
+    ) -> None:
+        """Test timeouts are converted to cached FetchErrors."""
+        cache.configure(tmp_path / "cache.db", negative_ttl=60)
+        fetch = AsyncMock(side_effect=TimeoutError)
+
+        for _ in range(2):
+            with pytest.raises(FetchError, match="timed out"):
+                await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+
+        fetch.assert_awaited_once()
+
+    async def test_stale_while_revalidate(
+        self, cache: SQLiteCache, tmp_path: Path
+    ) -> None:
+        """Test a stale entry is served while being refreshed in the background."""
+        cache.configure(tmp_path / "cache.db", stale_ttl=3600)
+        hass = MagicMock()
+        tasks = []
+        hass.async_create_background_task.side_effect = lambda coro, **_: (
+            tasks.append(asyncio.ensure_future(coro)) or tasks[-1]
+        )
+        await cache.async_set("tool", None, {"value": "old"}, ttl=3600)
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 120",
+        )
+
+        fetch = AsyncMock(return_value={"value": "new"})
+        result = await cache.async_get_or_fetch(hass, "tool", None, fetch, 60)
+
+        assert result == {"value": "old"}
+        await asyncio.gather(*tasks)
+        fetch.assert_awaited_once()
+        assert await cache.async_get("tool", None) == {"value": "new"}
+
+    async def test_source_stats(self, cache: SQLiteCache, mock_hass: MagicMock) -> None:
+        """Test hits, misses, expiry and sizes are counted per source."""
+        fetch = AsyncMock(return_value={"value": 1})
+        for _ in range(2):
+            await cache.async_get_or_fetch(mock_hass, "lexicanum", None, fetch, 60)
+        await cache.async_set("fandom", None, {"value": 2}, ttl=0)
+        await cache.async_sweep()
+
+        lexicanum = cache.get_source_stats("lexicanum")
+        assert (lexicanum.hits, lexicanum.misses) == (1, 1)
+        assert lexicanum.hit_latency is not None
+        assert lexicanum.entries == 1
+        assert lexicanum.size_bytes > 0
+        assert cache.get_source_stats("fandom").expired == 1
+        assert cache.get_source_stats("fandom").entries == 0
+
+        stats = cache.get_stats()
+        assert stats["sources"]["lexicanum"]["hits"] == 1
+        assert stats["disk"]["size_bytes"] == lexicanum.size_bytes
+
+    async def test_stale_entry_refetched_without_swr(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test a stale entry is fetched again when revalidation is disabled."""
+        await cache.async_set("tool", None, {"value": "old"}, ttl=3600)
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 120",
+        )
+
+        fetch = AsyncMock(return_value={"value": "new"})
+        result = await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+
+        assert result == {"value": "new"}
+
+    async def test_stale_entry_served_at_deadline(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test a refetch missing the deadline serves the stale entry as partial."""
+        await cache.async_set("tool", None, {"value": "old"}, ttl=3600)
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 120",
+        )
+        release = asyncio.Event()
+
+        async def _slow_fetch() -> dict:
+            await release.wait()
+            return {"value": "new"}
+
+        deadline = asyncio.get_running_loop().time() + 0.01
+        result = await cache.async_get_or_fetch(
+            mock_hass, "tool", None, _slow_fetch, 60, deadline=deadline
+        )
+        assert result == {"value": "old", "partial": True}
+
+        # The refetch finishes in the background, ready for the next call
+        release.set()
+        await _drain_worker(cache)
+        fetch = AsyncMock()
+        result = await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+        assert result == {"value": "new"}
+        fetch.assert_not_awaited()
+
+    async def test_miss_times_out_at_deadline(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test a fetch missing the deadline without a stale entry times out."""
+        release = asyncio.Event()
+
+        async def _slow_fetch() -> dict:
+            await release.wait()
+            return {"value": "new"}
+
+        deadline = asyncio.get_running_loop().time()
+        with pytest.raises(TimeoutError):
+            await cache.async_get_or_fetch(
+                mock_hass, "tool", None, _slow_fetch, 60, deadline=deadline
+            )
+        release.set()
+        await _drain_worker(cache)
+
+    async def test_revalidate_renews_unchanged_entry(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test an entry revalidated as unchanged only has its age renewed."""
+        fetch = AsyncMock(return_value={"value": "old", "etag": "v1"})
+        revalidate = AsyncMock(side_effect=lambda stale: stale)
+        await cache.async_get_or_fetch(
+            mock_hass, "tool", None, fetch, 60, revalidate=revalidate
+        )
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 120",
+        )
+
+        result = await cache.async_get_or_fetch(
+            mock_hass, "tool", None, fetch, 60, revalidate=revalidate
+        )
+
+        assert result == {"value": "old", "etag": "v1"}
+        fetch.assert_awaited_once()
+        revalidate.assert_awaited_once_with({"value": "old", "etag": "v1"})
+        assert cache.get_source_stats("tool").revalidated == 1
+        # Fresh again, and kept past the TTL for the next revalidation
+        created_at, expires_at = await cache._async_run(  # noqa: SLF001
+            lambda: cache._conn.execute(  # noqa: SLF001
+                "SELECT created_at, expires_at FROM cache"
+            ).fetchone()
+        )
+        assert created_at >= time.time() - 5
+        assert expires_at >= created_at + 60 + SQLiteCache.REVALIDATE_TTL
+        await cache.async_get_or_fetch(
+            mock_hass, "tool", None, fetch, 60, revalidate=revalidate
+        )
+        revalidate.assert_awaited_once()
+
+    async def test_revalidate_past_stale_window(
+        self, cache: SQLiteCache, tmp_path: Path, mock_hass: MagicMock
+    ) -> None:
+        """Test a kept entry past the stale window is revalidated before use."""
+        cache.configure(tmp_path / "cache.db", stale_ttl=60)
+        fetch = AsyncMock(return_value={"value": "old"})
+        revalidate = AsyncMock(return_value={"value": "new"})
+        await cache.async_get_or_fetch(
+            mock_hass, "tool", None, fetch, 60, revalidate=revalidate
+        )
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 3 * 86400",
+        )
+
+        result = await cache.async_get_or_fetch(
+            mock_hass, "tool", None, fetch, 60, revalidate=revalidate
+        )
+
+        assert result == {"value": "new"}
+        revalidate.assert_awaited_once_with({"value": "old"})
+        # Fetched in place, no refresh left running in the background
+        assert [
+            call.kwargs["name"]
+            for call in mock_hass.async_create_background_task.call_args_list
+        ] == ["wh40k cache fetch tool"] * 2
+
+    async def test_circuit_breaker(
+        self, cache: SQLiteCache, monkeypatch: pytest.MonkeyPatch, mock_hass: MagicMock
+    ) -> None:
+        """Test repeated failures fail fast until a trial fetch succeeds."""
+        monkeypatch.setattr(cache, "BREAKER_THRESHOLD", 2)
+        fetch = AsyncMock(side_effect=TimeoutError)
+        for _ in range(2):
+            with pytest.raises(FetchError, match="timed out"):
+                await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+
+        # Open: other keys of the source fail without contacting the upstream
+        with pytest.raises(FetchError, match="unavailable"):
+            await cache.async_get_or_fetch(mock_hass, "tool", {"q": 1}, fetch, 60)
+        assert fetch.await_count == 2
+        assert cache.get_stats()["circuit_breakers"]["tool"]["state"] == "open"
+
+        # Half open: one trial fetch, whose success closes the breaker
+        breaker = cache.get_breaker("tool")
+        breaker.opened_at -= cache.BREAKER_COOLDOWN
+        fetch.side_effect = None
+        fetch.return_value = {"value": 1}
+        assert await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60) == {
+            "value": 1
+        }
+        assert breaker.state == "closed"
+
+    async def test_failed_refetch_serves_stale(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test a refetch failing with the breaker closed serves the stale entry."""
+        await cache.async_set("tool", None, {"value": "old"}, ttl=3600)
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 120",
+        )
+
+        fetch = AsyncMock(side_effect=FetchError("HTTP 503"))
+        result = await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+
+        assert result == {"value": "old", "partial": True}
+        assert cache.get_breaker("tool").state == "closed"
+        fetch.assert_awaited_once()
+
+    async def test_circuit_breaker_serves_stale(
+        self, cache: SQLiteCache, tmp_path: Path, mock_hass: MagicMock
+    ) -> None:
+        """Test failed refetches keep the stale entry, served once open."""
+        cache.configure(tmp_path / "cache.db", negative_ttl=300)
+        await cache.async_set("tool", None, {"value": "old"}, ttl=3600)
+        await cache.async_flush()
+        cache.memory.clear()
+        await cache._async_run(  # noqa: SLF001
+            cache._conn.execute,  # noqa: SLF001
+            "UPDATE cache SET created_at = created_at - 120",
+        )
+
+        fetch = AsyncMock(side_effect=FetchError("HTTP 503"))
+        for _ in range(cache.BREAKER_THRESHOLD):
+            result = await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+            assert result == {"value": "old", "partial": True}
+        result = await cache.async_get_or_fetch(mock_hass, "tool", None, fetch, 60)
+
+        assert result == {"value": "old"}
+        assert fetch.await_count == cache.BREAKER_THRESHOLD
+        assert cache.get_breaker("tool").state == "open"
+
+    async def test_get_or_fetch_serves_smaller_requests_from_superset(
+        self, cache: SQLiteCache, mock_hass: MagicMock
+    ) -> None:
+        """Test accept serves covered requests and refetches larger ones."""
+        fetch = AsyncMock(side_effect=[{"limit": 3}, {"limit": 5}])
+
+        async def _get(limit: int) -> dict:
+            return await cache.async_get_or_fetch(
+                mock_hass,
+                "tool",
+                None,
+                fetch,
+                60,
+                accept=lambda data: data["limit"] >= limit,
+            )
+
+        assert await _get(3) == {"limit": 3}
+        assert await _get(1) == {"limit": 3}
+        assert fetch.await_count == 1
+        assert await _get(5) == {"limit": 5}
+        assert fetch.await_count == 2
+
+    async def test_get_or_fetch_failure_keeps_smaller_result(
+        self, cache: SQLiteCache, tmp_path: Path, mock_hass: MagicMock
+    ) -> None:
+        """Test a failed larger request does not replace a covered result."""
+        cache.configure(tmp_path / "cache.db", negative_ttl=60)
+        fetch = AsyncMock(side_effect=[{"limit": 3}, FetchError("down")])
+
+        async def _get(limit: int) -> dict:
+            return await cache.async_get_or_fetch(
+                mock_hass,
+                "tool",
+                None,
+                fetch,
+                60,
+                accept=lambda data: data["limit"] >= limit,
+            )
+
+        assert await _get(3) == {"limit": 3}
+        with pytest.raises(FetchError):
+            await _get(5)
+        assert await _get(1) == {"limit": 3}
+        assert fetch.await_count == 2
+
+    async def test_persists_across_restart(
+        self, cache: SQLiteCache, tmp_path: Path
+    ) -> None:
+        """Test entries survive closing and reopening the database."""
+        await cache.async_set("tool", None, {"value": 1})
+        await cache.async_close()
+
+        cache.configure(tmp_path / "cache.db")
+        assert await cache.async_get("tool", None) == {"value": 1}
+
+    async def test_writes_are_batched(self, cache: SQLiteCache, tmp_path: Path) -> None:
+        """Test async writes are queued and flushed in one transaction."""
+        await cache._async_run(cache._ensure_db)  # noqa: SLF001
+        await cache.async_set("tool", {"q": "a"}, {"value": 1})
+        await cache.async_set("tool", {"q": "b"}, {"value": 2})
+
+        def _count() -> int:
+            conn = sqlite3.connect(tmp_path / "cache.db")
+            try:
+                return conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            finally:
+                conn.close()
+
+        assert await cache._async_run(_count) == 0  # noqa: SLF001
+        assert await cache.async_flush() == 2
+        assert await cache._async_run(_count) == 2  # noqa: SLF001
+        assert await cache.async_flush() == 0
+
+    async def test_read_flushes_pending_write(self, cache: SQLiteCache) -> None:
+        """Test a queued write is visible to reads that miss the memory tier."""
+        await cache.async_set("tool", None, {"value": 1})
+        cache.memory.clear()
+
+        assert await cache.async_get("tool", None) == {"value": 1}
+
+    async def test_uses_wal_mode(self, cache: SQLiteCache) -> None:
+        """Test the database is opened in write-ahead logging mode."""
+        conn = await cache._async_run(cache._ensure_db)  # noqa: SLF001
+        mode = await cache._async_run(  # noqa: SLF001
+            lambda: conn.execute("PRAGMA journal_mode").fetchone()[0]
+        )
+
+        assert mode == "wal"
+
+    async def test_snapshot_round_trip(
+        self, cache: SQLiteCache, tmp_path: Path
+    ) -> None:
+        """Test exported entries are merged into another cache, newest wins."""
+        now = int(time.time())
+        for name, created_at in (("a", now - 60), ("b", now - 60)):
+            await cache._async_run(  # noqa: SLF001
+                cache.set, "tool", {"q": name}, {"value": name}, created_at, 3600
+            )
+        await cache.async_set("tool", {"q": "failed"}, CachedFailure("Nope"), ttl=60)
+        snapshot = tmp_path / "snapshot.json.gz"
+        assert await cache.async_export_snapshot(snapshot) == 2
+        await cache.async_close()
+
+        # "a" is newer locally and kept, "b" is older and replaced
+        cache.configure(tmp_path / "other.db")
+        await cache._async_run(  # noqa: SLF001
+            cache.set, "tool", {"q": "a"}, {"value": "local"}, now, 3600
+        )
+        await cache._async_run(  # noqa: SLF001
+            cache.set, "tool", {"q": "b"}, {"value": "local"}, now - 120, 3600
+        )
+
+        assert await cache.async_import_snapshot(snapshot) == 1
+        assert await cache.async_get("tool", {"q": "a"}) == {"value": "local"}
+        assert await cache.async_get("tool", {"q": "b"}) == {"value": "b"}
+        assert await cache.async_get("tool", {"q": "failed"}) is None
+
+    async def test_invalidate(self, cache: SQLiteCache) -> None:
+        """Test entries are purged by source, label and label prefix."""
+        entries = (
+            ("wahapedia", "space-marines"),
+            ("wahapedia", "necrons"),
+            ("lexicanum", "horus heresy"),
+            ("lexicanum", "horus"),
+            ("fandom", "horus heresy"),
+        )
+        for source, label in entries:
+            await cache.async_set(source, {"q": label}, {"value": 1}, label=label)
+
+        assert await cache.async_invalidate("wahapedia", "space-marines") == 1
+        assert await cache.async_get("wahapedia", {"q": "space-marines"}) is None
+        assert await cache.async_get("wahapedia", {"q": "necrons"}) == {"value": 1}
+
+        assert await cache.async_invalidate("lexicanum", pattern="horus h") == 1
+        assert await cache.async_get("lexicanum", {"q": "horus"}) == {"value": 1}
+        assert await cache.async_get("fandom", {"q": "horus heresy"}) == {"value": 1}
+
+        assert await cache.async_invalidate("fandom") == 1
+        assert await cache.async_invalidate() == 2
+        assert cache.get_source_stats("lexicanum").entries == 0
+
+    async def test_invalidate_empty_pattern(self, cache: SQLiteCache) -> None:
+        """Test an empty pattern matches labelled entries only."""
+        await cache.async_set("lexicanum", {"q": "horus"}, {"value": 1}, label="horus")
+        await cache.async_set("lexicanum", {"pageid": 1}, {"value": 2})
+
+        assert await cache.async_invalidate("lexicanum", pattern="") == 1
+        assert await cache.async_get("lexicanum", {"pageid": 1}) == {"value": 2}
+
+    async def test_clear_drops_memory_only_entries(self, cache: SQLiteCache) -> None:
+        """Test clearing a source drops entries no longer on disk from memory."""
+        await cache.async_set("lexicanum", {"q": "horus"}, {"value": 1})
+        # Gone from disk, as after an eviction, but still held in memory
+        await cache._async_run(cache.invalidate)  # noqa: SLF001
+
+        assert await cache.async_invalidate("lexicanum") == 0
+        assert await cache.async_get("lexicanum", {"q": "horus"}) is None
+
+    async def test_invalidate_drops_memory_only_entries(
+        self, cache: SQLiteCache
+    ) -> None:
+        """Test a label purge drops matching entries no longer on disk from memory."""
+        await cache.async_set("lexicanum", {"q": "horus"}, {"value": 1}, label="horus")
+        await cache._async_run(cache.invalidate)  # noqa: SLF001
+
+        assert await cache.async_invalidate("lexicanum", pattern="horus") == 0
+        assert await cache.async_get("lexicanum", {"q": "horus"}) is None
+
+    async def test_import_invalid_snapshot(
+        self, cache: SQLiteCache, tmp_path: Path
+    ) -> None:
+        """Test unreadable snapshots are rejected."""
+        snapshot = tmp_path / "snapshot.json.gz"
+        snapshot.write_bytes(b"not a snapshot")
+
+        with pytest.raises(ValueError, match="Failed to read cache snapshot"):
+            await cache.async_import_snapshot(snapshot)
+
+    async def test_unknown_schema_version_recreates(
+        self, cache: SQLiteCache, tmp_path: Path
+    ) -> None:
+        """Test an unsupported schema version drops the cached entries."""
+        await cache.async_set("tool", None, {"value": 1})
+        await cache.async_close()
+
+        conn = sqlite3.connect(tmp_path / "cache.db")
+        conn.execute("UPDATE schema_version SET version = ?", (SCHEMA_VERSION + 1,))
+        conn.commit()
+        conn.close()
+
+        assert await cache.async_get("tool", None) is None
+
+    async def test_corrupt_database_recreated(self, tmp_path: Path) -> None:
+        """Test a corrupt database file is replaced with an empty cache."""
+        db_path = tmp_path / "cache.db"
+        db_path.write_bytes(b"not a database" * 100)
+
+        SQLiteCache._instance = None  # noqa: SLF001
+        cache = SQLiteCache()
+        cache.configure(db_path)
+        try:
+            assert await cache.async_get("tool", None) is None
+        finally:
+            await cache.async_shutdown()
+
+
+class TestCodec:
+    """Test the cache payload codecs."""
+
+    def test_small_payload_uncompressed(self) -> None:
+        """Test small payloads are stored as plain JSON."""
+        tag, payload, size = codec.encode({"value": 1})
+
+        assert tag == codec.CODEC_JSON
+        assert size == len(payload)
+        assert codec.decode(tag, payload) == ({"value": 1}, size)
+
+    def test_large_payload_compressed(self) -> None:
+        """Test large payloads are compressed and round trip."""
+        data = {"sections": [{"title": "Shooting Phase", "content": "x" * 2000}]}
+        tag, payload, size = codec.encode(data)
+
+        assert tag == codec.CODEC_JSON_ZLIB
+        assert len(payload) < size
+        assert codec.decode(tag, payload) == (data, size)
+
+    def test_legacy_text_payload(self) -> None:
+        """Test JSON text written before codecs existed still decodes."""
+        assert codec.decode("json", '{"value": 1}')[0] == {"value": 1}
+
+    def test_unknown_codec(self) -> None:
+        """Test unknown codecs are rejected."""
+        with pytest.raises(ValueError, match="Unknown cache codec"):
+            codec.decode("lz4", b"")
+
+    async def test_compressed_round_trip_through_cache(
+        self, cache: SQLiteCache
+    ) -> None:
+        """Test compressed rows are read back from the database."""
+        data = {"sections": [{"title": "Charge Phase", "content": "y" * 4000}]}
+        await cache.async_set("tool", None, data)
+        cache.memory.clear()
+
+        assert await cache.async_get("tool", None) == data
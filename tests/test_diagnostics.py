@@ -0,0 +1,22 @@
+"""Test the WH40k Tools for Assist diagnostics."""
+
+from unittest.mock import MagicMock, patch
+
+from custom_components.wh40k_tools_for_assist.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+async def test_config_entry_diagnostics(
+    mock_hass: MagicMock, mock_config_entry: MagicMock
+) -> None:
+    """Test diagnostics include the entry configuration and cache counters."""
+    with patch(
+        "custom_components.wh40k_tools_for_assist.diagnostics.SQLiteCache"
+    ) as mock_cache:
+        mock_cache.return_value.get_stats.return_value = {"coalesced": 2}
+        result = await async_get_config_entry_diagnostics(mock_hass, mock_config_entry)
+
+    assert result["data"] == mock_config_entry.data
+    assert result["options"] == {}
+    assert result["cache"] == {"coalesced": 2}
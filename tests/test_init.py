@@ -1,15 +1,27 @@
 """Test the WH40k Tools for Assist integration."""
 
+from collections.abc import AsyncGenerator
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 
+from custom_components import wh40k_tools_for_assist as integration
 from custom_components.wh40k_tools_for_assist import (
     DOMAIN,
     async_setup,
     async_setup_entry,
     async_unload_entry,
 )
+from custom_components.wh40k_tools_for_assist.cache import SQLiteCache
+
+
+@pytest.fixture(autouse=True)
+async def shutdown_cache() -> AsyncGenerator[None]:
+    """Stop the cache worker thread the entry setup and unload start."""
+    yield
+    await SQLiteCache().async_shutdown()
 
 
 class TestWh40kToolsIntegration:
@@ -30,14 +42,57 @@ class TestWh40kToolsIntegration:
         """Test setting up a config entry."""
         mock_hass.data[DOMAIN] = {}
         mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        # Cache database earlier versions left in the integration directory
+        legacy_db = Path(integration.__file__).parent / "cache.db"
+        legacy_db.touch()
 
-        with patch(
-            "custom_components.wh40k_tools_for_assist.setup_llm_functions"
-        ) as mock_setup:
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.setup_llm_functions"
+            ) as mock_setup,
+            patch(
+                "custom_components.wh40k_tools_for_assist.async_track_time_interval"
+            ) as mock_track,
+            patch(
+                "custom_components.wh40k_tools_for_assist.async_import_startup_snapshot",
+                new_callable=MagicMock,
+            ) as mock_import,
+        ):
             result = await async_setup_entry(mock_hass, mock_config_entry)
 
             assert result is True
             mock_setup.assert_called_once_with(mock_hass, mock_config_entry.data)
+            # Periodic flush of queued writes and sweep of expired entries
+            assert mock_track.call_count == 2
+            mock_hass.bus.async_listen_once.assert_called_once()
+            mock_import.assert_called_once_with(mock_hass)
+            mock_config_entry.async_on_unload.assert_called_with(
+                mock_track.return_value
+            )
+            assert not legacy_db.exists()
+
+    @pytest.mark.asyncio
+    async def test_stop_shuts_down_cache(
+        self, mock_hass: MagicMock, mock_config_entry: MagicMock
+    ) -> None:
+        """Test stopping Home Assistant shuts down the cache worker."""
+        mock_hass.data[DOMAIN] = {}
+
+        with (
+            patch("custom_components.wh40k_tools_for_assist.setup_llm_functions"),
+            patch("custom_components.wh40k_tools_for_assist.async_track_time_interval"),
+            patch(
+                "custom_components.wh40k_tools_for_assist.async_import_startup_snapshot",
+                new_callable=MagicMock,
+            ),
+            patch.object(SQLiteCache, "async_shutdown") as mock_shutdown,
+        ):
+            await async_setup_entry(mock_hass, mock_config_entry)
+            event_type, listener = mock_hass.bus.async_listen_once.call_args.args
+            await listener(MagicMock())
+
+        assert event_type == EVENT_HOMEASSISTANT_STOP
+        mock_shutdown.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_async_unload_entry(
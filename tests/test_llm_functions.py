@@ -0,0 +1,187 @@
+"""Test the WH40k LLM API and the search of all sources."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.wh40k_tools_for_assist.const import (
+    CONF_WH40K_FANDOM_MAX_CHARS,
+    CONF_WH40K_LEXICANUM_MAX_CHARS,
+    DOMAIN,
+)
+from custom_components.wh40k_tools_for_assist.llm_functions import (
+    SearchWh40kAllTool,
+    Wh40kAPI,
+    merge_results,
+)
+from custom_components.wh40k_tools_for_assist.wh40k_fandom import SearchWh40kFandomTool
+from custom_components.wh40k_tools_for_assist.wh40k_lexicanum import (
+    SearchWh40kLexicanumTool,
+)
+from custom_components.wh40k_tools_for_assist.wh40k_wahapedia import (
+    SearchWh40kWahapediaTool,
+)
+
+
+def _article(title: str, site: str) -> dict:
+    """Return a wiki result for an article."""
+    return {"title": title, "summary": f"{title} on {site}", "url": f"{site}/{title}"}
+
+
+class TestWh40kAPI:
+    """Test the tools offered by the API."""
+
+    def test_all_sources_tool_with_several_sources(
+        self, mock_hass: MagicMock, mock_config_entry: MagicMock
+    ) -> None:
+        """Test the search of all sources is offered next to the source tools."""
+        mock_hass.data[DOMAIN] = {"config": dict(mock_config_entry.data)}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+
+        tools = Wh40kAPI(mock_hass, "WH40k").get_enabled_tools()
+
+        assert [tool.name for tool in tools] == [
+            "search_wh40k_lexicanum",
+            "search_wh40k_fandom",
+            "search_wh40k_wahapedia",
+            "search_wh40k_all_sources",
+        ]
+        assert tools[-1].tools == tools[:-1]
+
+    def test_no_all_sources_tool_with_one_source(
+        self, mock_hass: MagicMock, mock_config_entry_lexicanum_only: MagicMock
+    ) -> None:
+        """Test a single source is not offered twice."""
+        mock_hass.data[DOMAIN] = {"config": dict(mock_config_entry_lexicanum_only.data)}
+        mock_hass.config_entries.async_entries.return_value = [
+            mock_config_entry_lexicanum_only
+        ]
+
+        tools = Wh40kAPI(mock_hass, "WH40k").get_enabled_tools()
+
+        assert [tool.name for tool in tools] == ["search_wh40k_lexicanum"]
+
+
+class TestMergeResults:
+    """Test merging the results of several sources."""
+
+    def test_ranks_and_deduplicates(self) -> None:
+        """Test title matches come first and shared articles are kept once."""
+        merged = merge_results(
+            "Roboute Guilliman",
+            {
+                "lexicanum": {
+                    "results": [
+                        _article("Ultramarines", "lexicanum"),
+                        _article("Roboute Guilliman", "lexicanum"),
+                    ]
+                },
+                "fandom": {
+                    "results": [
+                        _article("roboute guilliman", "fandom"),
+                        _article("Primarchs", "fandom"),
+                    ]
+                },
+            },
+        )
+
+        assert [(result["source"], result["title"]) for result in merged] == [
+            ("fandom", "roboute guilliman"),
+            ("lexicanum", "Ultramarines"),
+            ("fandom", "Primarchs"),
+        ]
+        assert merged[0]["also_at"] == ["lexicanum/Roboute Guilliman"]
+
+    def test_rules_kept_apart_from_lore(self) -> None:
+        """Test a rule section is not merged into a lore article of its name."""
+        section = {"title": "Psychic", "content": "Rules", "url": "wahapedia"}
+        merged = merge_results(
+            "psychic",
+            {
+                "lexicanum": {"results": [_article("Psychic", "lexicanum")]},
+                "wahapedia": {"results": [section, section]},
+            },
+        )
+
+        assert [result["source"] for result in merged] == ["lexicanum", "wahapedia"]
+        assert "also_at" not in merged[1]
+
+
+class TestSearchWh40kAllTool:
+    """Test the search of all sources."""
+
+    async def test_searches_sources_concurrently(
+        self, mock_hass: MagicMock, mock_config_entry: MagicMock
+    ) -> None:
+        """Test every source is searched with the arguments it accepts."""
+        mock_hass.data[DOMAIN] = {"config": dict(mock_config_entry.data)}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        lexicanum = SearchWh40kLexicanumTool()
+        lexicanum.async_call = AsyncMock(
+            return_value={"results": [_article("Horus", "lexicanum")], "partial": True}
+        )
+        fandom = SearchWh40kFandomTool()
+        fandom.async_call = AsyncMock(return_value={"error": "Fandom is down"})
+        wahapedia = SearchWh40kWahapediaTool()
+        wahapedia.async_call = AsyncMock(return_value={"result": "No matches"})
+        tool_input = MagicMock(tool_args={"query": "Horus", "faction": "Death Guard"})
+
+        result = await SearchWh40kAllTool([lexicanum, fandom, wahapedia]).async_call(
+            mock_hass, tool_input, MagicMock()
+        )
+
+        assert lexicanum.async_call.await_args.args[1].tool_args == {"query": "Horus"}
+        assert wahapedia.async_call.await_args.args[1].tool_args == {
+            "query": "Horus",
+            "faction": "Death Guard",
+        }
+        assert result == {
+            "results": [{"source": "lexicanum", **_article("Horus", "lexicanum")}],
+            "errors": {"fandom": "Fandom is down"},
+            "partial": True,
+        }
+
+    async def test_merged_results_share_one_budget(
+        self, mock_hass: MagicMock, mock_config_entry: MagicMock
+    ) -> None:
+        """Test the merged results are trimmed to the largest source budget."""
+        mock_hass.data[DOMAIN] = {
+            "config": {
+                **mock_config_entry.data,
+                CONF_WH40K_LEXICANUM_MAX_CHARS: 100,
+                CONF_WH40K_FANDOM_MAX_CHARS: 200,
+            }
+        }
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        lexicanum = SearchWh40kLexicanumTool()
+        fandom = SearchWh40kFandomTool()
+        for tool in (lexicanum, fandom):
+            tool.async_call = AsyncMock(
+                return_value={
+                    "results": [
+                        {
+                            **_article(f"{tool.source} {title}", tool.source),
+                            "summary": "word " * 40,
+                        }
+                        for title in ("Horus", "Sanguinius")
+                    ]
+                }
+            )
+        tool_input = MagicMock(tool_args={"query": "Horus"})
+
+        result = await SearchWh40kAllTool([lexicanum, fandom]).async_call(
+            mock_hass, tool_input, MagicMock()
+        )
+
+        assert len(result["results"]) == 4
+        assert all(len(item["summary"]) <= 50 for item in result["results"])
+
+    async def test_all_sources_failing(self, mock_hass: MagicMock) -> None:
+        """Test an error is returned when no source could be searched."""
+        lexicanum = SearchWh40kLexicanumTool()
+        lexicanum.async_call = AsyncMock(side_effect=RuntimeError("boom"))
+        tool_input = MagicMock(tool_args={"query": "Horus"})
+
+        result = await SearchWh40kAllTool([lexicanum]).async_call(
+            mock_hass, tool_input, MagicMock()
+        )
+
+        assert result == {"error": "Error searching lexicanum"}
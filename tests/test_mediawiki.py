@@ -0,0 +1,277 @@
+"""Test the shared MediaWiki client."""
+
+import asyncio
+import time
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.wh40k_tools_for_assist.cache import SQLiteCache
+from custom_components.wh40k_tools_for_assist.const import (
+    CONF_RESPONSE_DEADLINE,
+    DOMAIN,
+)
+from custom_components.wh40k_tools_for_assist.errors import FetchError, NotFoundError
+from custom_components.wh40k_tools_for_assist.mediawiki import MediaWikiClient
+from custom_components.wh40k_tools_for_assist.wh40k_lexicanum import (
+    SearchWh40kLexicanumTool,
+)
+
+
+def _client(*responses: MagicMock) -> MediaWikiClient:
+    """Return a client whose session replies with the given responses."""
+    session = MagicMock()
+    session.get.side_effect = responses
+    return MediaWikiClient(
+        session, "https://wiki.test/api.php", "https://wiki.test/wiki/", "Test Wiki"
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_backoff() -> Any:
+    """Skip the retry backoff."""
+    with patch(
+        "custom_components.wh40k_tools_for_assist.ratelimit._sleep",
+        AsyncMock(),
+    ):
+        yield
+
+
+class TestMediaWikiClient:
+    """Test the MediaWiki client."""
+
+    async def test_retries_server_errors(
+        self, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test server errors are retried before giving up."""
+        client = _client(mock_response(503), mock_response(200, json={"query": {}}))
+
+        assert await client.async_query(list="search") == {"query": {}}
+
+    async def test_client_errors_not_retried(
+        self, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test client errors fail straight away."""
+        client = _client(mock_response(404), mock_response(200))
+
+        with pytest.raises(FetchError, match="Test Wiki search error: 404"):
+            await client.async_query(list="search")
+
+    async def test_search(
+        self,
+        mock_response: Callable[..., MagicMock],
+        lexicanum_search_results: dict[str, Any],
+    ) -> None:
+        """Test hits come with their latest revision in one request."""
+        data = {
+            "query": {
+                "search": [
+                    {**hit, "pageid": pageid}
+                    for pageid, hit in enumerate(
+                        lexicanum_search_results["query"]["search"], 1
+                    )
+                ],
+                "pages": {"1": {"lastrevid": 10}, "2": {"lastrevid": 20}},
+            }
+        }
+        client = _client(mock_response(200, json=data))
+
+        hits = await client.async_search("Space  Marines", 2)
+
+        params = client._session.get.call_args.kwargs["params"]  # noqa: SLF001
+        assert params["gsrsearch"] == params["srsearch"] == "Space Marines"
+        assert hits == [
+            {
+                "title": "Space Marines",
+                "pageid": 1,
+                "revid": 10,
+                "snippet": "The Space Marines are...",
+            },
+            {
+                "title": "Ultramarines",
+                "pageid": 2,
+                "revid": 20,
+                "snippet": "The Ultramarines are...",
+            },
+        ]
+
+    async def test_get_extracts_fetches_capped_extracts(
+        self, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test extracts cut off by the wiki are fetched separately."""
+        data = {
+            "continue": {"excontinue": 1},
+            "query": {"pages": {"1": {"extract": "Batched"}, "2": {}, "3": {}}},
+        }
+        client = _client(
+            mock_response(200, json=data),
+            mock_response(
+                200, json={"query": {"pages": {"2": {"extract": "Fetched"}}}}
+            ),
+            mock_response(404),
+        )
+
+        assert await client.async_get_extracts([1, 2, 3]) == {
+            1: "Batched",
+            2: "Fetched",
+        }
+
+    async def test_search_not_found(
+        self, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test an empty result set raises NotFoundError."""
+        client = _client(mock_response(200, json={"query": {"search": []}}))
+
+        with pytest.raises(NotFoundError):
+            await client.async_search("Squats", 1)
+
+
+class TestMediaWikiSearchTool:
+    """Test the shared MediaWiki search tool."""
+
+    async def test_search_missing_deadline(
+        self, mock_hass: MagicMock, mock_config_entry: MagicMock
+    ) -> None:
+        """Test a search missing the deadline returns an error."""
+        mock_hass.data[DOMAIN] = {"config": {CONF_RESPONSE_DEADLINE: 0.05}}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        tool_input = MagicMock()
+        tool_input.tool_args = {"query": "Horus"}
+
+        async def _get_or_fetch(*_args: Any, deadline: float, **_kwargs: Any) -> dict:
+            async with asyncio.timeout_at(deadline):
+                await asyncio.Event().wait()
+            return {}
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.mediawiki.async_get_clientsession"
+            ),
+            patch(
+                "custom_components.wh40k_tools_for_assist.mediawiki.SQLiteCache"
+            ) as mock_cache,
+        ):
+            mock_cache.return_value.async_get_or_fetch = _get_or_fetch
+
+            result = await SearchWh40kLexicanumTool().async_call(
+                mock_hass, tool_input, MagicMock()
+            )
+
+        assert result == {"error": "Warhammer 40k Lexicanum did not respond in time"}
+
+    async def test_articles_shared_between_queries(
+        self, mock_hass: MagicMock, cache: SQLiteCache
+    ) -> None:
+        """Test article extracts are fetched once per revision."""
+        client = MagicMock(MAX_EXCHARS=MediaWikiClient.MAX_EXCHARS)
+        client.async_get_extracts = AsyncMock(return_value={1: "Primarch"})
+        hit = {"title": "Roboute Guilliman", "pageid": 1, "revid": 10, "snippet": ""}
+        tool = SearchWh40kLexicanumTool()
+
+        # Same revision and a smaller budget are served from the cache,
+        # a new revision or a larger budget fetch the extract again
+        for revid, chars in ((10, 500), (10, 300), (11, 500), (11, 800)):
+            summaries = await tool._async_get_summaries(  # noqa: SLF001
+                mock_hass,
+                cache,
+                client,
+                [{**hit, "revid": revid}],
+                3600,
+                1e9,
+                chars,
+            )
+            assert summaries == ({1: "Primarch"}, True)
+
+        assert [call.args[1] for call in client.async_get_extracts.await_args_list] == [
+            500,
+            500,
+            800,
+        ]
+
+    async def test_concurrent_calls_share_extract_fetch(
+        self, mock_hass: MagicMock, cache: SQLiteCache
+    ) -> None:
+        """Test concurrent calls for an article join one extract fetch."""
+        fetching = asyncio.Event()
+        release = asyncio.Event()
+        calls = 0
+
+        async def _slow_extracts(_pageids: list[int], _chars: int) -> dict[int, str]:
+            nonlocal calls
+            calls += 1
+            fetching.set()
+            await release.wait()
+            return {1: "Primarch"}
+
+        client = MagicMock(MAX_EXCHARS=MediaWikiClient.MAX_EXCHARS)
+        client.async_get_extracts = _slow_extracts
+        hits = [{"title": "Roboute Guilliman", "pageid": 1, "revid": 10}]
+        tool = SearchWh40kLexicanumTool()
+
+        calls_done = asyncio.gather(
+            *(
+                tool._async_get_summaries(  # noqa: SLF001
+                    mock_hass, cache, client, hits, 3600, 1e9, 500
+                )
+                for _ in range(3)
+            )
+        )
+        # Let every call finish its cache lookup before the fetch ends
+        await fetching.wait()
+        await cache._async_run(time.time)  # noqa: SLF001
+        await asyncio.sleep(0.01)
+        release.set()
+        results = await calls_done
+
+        assert results == [({1: "Primarch"}, True)] * 3
+        assert calls == 1
+
+    async def test_slow_extracts_return_partial(
+        self, mock_hass: MagicMock, cache: SQLiteCache
+    ) -> None:
+        """Test extracts missing the deadline are finished in the background."""
+        tasks: list[asyncio.Task] = []
+        mock_hass.async_create_background_task.side_effect = (
+            lambda target, *_, **__: tasks.append(asyncio.ensure_future(target))
+            or tasks[-1]
+        )
+        release = asyncio.Event()
+
+        async def _slow_extracts(_pageids: list[int], _chars: int) -> dict[int, str]:
+            await release.wait()
+            return {1: "Primarch"}
+
+        client = MagicMock(MAX_EXCHARS=MediaWikiClient.MAX_EXCHARS)
+        client.async_get_extracts = _slow_extracts
+        hits = [{"title": "Roboute Guilliman", "pageid": 1, "revid": 10}]
+        tool = SearchWh40kLexicanumTool()
+
+        summaries = await tool._async_get_summaries(  # noqa: SLF001
+            mock_hass, cache, client, hits, 3600, 0, 500
+        )
+        assert summaries == ({}, False)
+
+        release.set()
+        await asyncio.gather(*tasks)
+        article = await cache.async_get("lexicanum", {"pageid": 1})
+        assert article["extract"] == "Primarch"
+
+    async def test_extract_failures_open_breaker(
+        self, mock_hass: MagicMock, cache: SQLiteCache
+    ) -> None:
+        """Test failed extract fetches trip the breaker and are then skipped."""
+        client = MagicMock(MAX_EXCHARS=MediaWikiClient.MAX_EXCHARS)
+        client.async_get_extracts = AsyncMock(side_effect=FetchError("down"))
+        hits = [{"title": "Roboute Guilliman", "pageid": 1, "revid": 10}]
+        tool = SearchWh40kLexicanumTool()
+
+        for _ in range(SQLiteCache.BREAKER_THRESHOLD + 1):
+            summaries = await tool._async_get_summaries(  # noqa: SLF001
+                mock_hass, cache, client, hits, 3600, 1e9, 500
+            )
+
+        assert summaries == ({}, False)
+        assert cache.get_breaker("lexicanum").state == "open"
+        assert client.async_get_extracts.await_count == SQLiteCache.BREAKER_THRESHOLD
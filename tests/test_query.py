@@ -0,0 +1,31 @@
+"""Test search query normalization."""
+
+import pytest
+
+from custom_components.wh40k_tools_for_assist.query import normalize_query
+
+
+class TestNormalizeQuery:
+    """Test query normalization for cache keys."""
+
+    @pytest.mark.parametrize(
+        "query",
+        ["Space Marines", "space marines ", "space  Marines", "Space-Marine"],
+    )
+    def test_variants_share_key(self, query: str) -> None:
+        """Test case, whitespace, punctuation and plurals are folded."""
+        assert normalize_query(query) == "space marine"
+
+    @pytest.mark.parametrize(
+        ("query", "expected"),
+        [
+            ("T'au Empire", "tau empire"),
+            ("Horus Heresy", "horus heresy"),
+            ("Chaos", "chaos"),
+            ("Heresies", "heresy"),
+            ("Orks", "ork"),
+        ],
+    )
+    def test_normalization(self, query: str, expected: str) -> None:
+        """Test apostrophes, names and irregular endings."""
+        assert normalize_query(query) == expected
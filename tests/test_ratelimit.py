@@ -0,0 +1,129 @@
+"""Test the per-host rate limiter."""
+
+from collections.abc import Callable
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.wh40k_tools_for_assist import ratelimit
+from custom_components.wh40k_tools_for_assist.errors import FetchError
+from custom_components.wh40k_tools_for_assist.ratelimit import (
+    RateLimiter,
+    async_request,
+    get_rate_limiter,
+    parse_retry_after,
+)
+
+
+@pytest.fixture(autouse=True)
+def limiters() -> Any:
+    """Give each test fresh limiters and skip real sleeps."""
+    with (
+        patch.dict(ratelimit._LIMITERS, clear=True),  # noqa: SLF001
+        patch(
+            "custom_components.wh40k_tools_for_assist.ratelimit._sleep",
+            AsyncMock(),
+        ) as mock_sleep,
+    ):
+        yield mock_sleep
+
+
+async def _read_status(resp: MagicMock) -> int:
+    """Return the status of a response."""
+    return resp.status
+
+
+class TestRateLimiter:
+    """Test the token bucket."""
+
+    def test_burst_then_spaced(self) -> None:
+        """Test requests beyond the burst are spaced by the rate."""
+        limiter = RateLimiter(rate=2.0, burst=2, max_concurrency=1)
+
+        delays = [limiter.reserve() for _ in range(4)]
+
+        assert delays[:2] == [0.0, 0.0]
+        assert delays[2] == pytest.approx(0.5, abs=0.01)
+        assert delays[3] == pytest.approx(1.0, abs=0.01)
+
+    def test_pause_holds_back_requests(self) -> None:
+        """Test a pause delays requests that have tokens."""
+        limiter = RateLimiter(rate=2.0, burst=2, max_concurrency=1)
+        limiter.pause(5)
+
+        assert limiter.reserve() == pytest.approx(5, abs=0.01)
+
+    def test_shared_per_host(self) -> None:
+        """Test URLs on one host share a limiter."""
+        assert get_rate_limiter("https://a.test/x") is get_rate_limiter(
+            "https://a.test/y"
+        )
+        assert get_rate_limiter("https://a.test/") is not get_rate_limiter(
+            "https://b.test/"
+        )
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (None, None),
+            ("3", 3.0),
+            ("soon", None),
+            ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+        ],
+    )
+    def test_parse_retry_after(self, value: str | None, expected: float | None) -> None:
+        """Test Retry-After seconds and past dates are parsed."""
+        assert parse_retry_after(value) == expected
+
+
+class TestAsyncRequest:
+    """Test rate limited requests."""
+
+    async def test_429_honours_retry_after(
+        self, mock_response: Callable[..., MagicMock], limiters: AsyncMock
+    ) -> None:
+        """Test a 429 is retried after Retry-After and pauses the host."""
+        session = MagicMock()
+        session.get.side_effect = [
+            mock_response(429, headers={"Retry-After": "3"}),
+            mock_response(200),
+        ]
+
+        assert (
+            await async_request(
+                session, "https://a.test/", _read_status, request_timeout=5
+            )
+            == 200
+        )
+        assert limiters.await_args_list[0].args == (3.0,)
+        # Sleeps are mocked, so other requests to the host are still paused
+        assert get_rate_limiter("https://a.test/").reserve() > 2
+
+    async def test_long_retry_after_not_retried(
+        self, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test a Retry-After longer than a voice turn fails the call."""
+        session = MagicMock()
+        session.get.side_effect = [mock_response(429, headers={"Retry-After": "600"})]
+
+        assert (
+            await async_request(
+                session, "https://a.test/", _read_status, request_timeout=5
+            )
+            == 429
+        )
+
+    async def test_long_pause_fails_fast(
+        self, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test requests fail at once while the host asked for a long pause."""
+        session = MagicMock()
+        session.get.side_effect = [mock_response(429, headers={"Retry-After": "3600"})]
+        await async_request(session, "https://a.test/", _read_status, request_timeout=5)
+
+        with pytest.raises(FetchError, match=r"a\.test asked to pause requests"):
+            await async_request(
+                session, "https://a.test/", _read_status, request_timeout=5
+            )
+        assert session.get.call_count == 1
@@ -0,0 +1,56 @@
+"""Test the WH40k Tools for Assist cache sensors."""
+
+from unittest.mock import MagicMock
+
+from custom_components.wh40k_tools_for_assist.cache import SourceStats
+from custom_components.wh40k_tools_for_assist.const import SOURCE_WH40K_LEXICANUM
+from custom_components.wh40k_tools_for_assist.sensor import (
+    SENSOR_DESCRIPTIONS,
+    Wh40kCacheSensor,
+    async_setup_entry,
+)
+
+
+class TestCacheSensors:
+    """Test the cache statistics sensors."""
+
+    async def test_sensors_for_enabled_sources(
+        self,
+        mock_hass: MagicMock,
+        mock_config_entry_lexicanum_only: MagicMock,
+    ) -> None:
+        """Test sensors are only created for enabled sources."""
+        async_add_entities = MagicMock()
+
+        await async_setup_entry(
+            mock_hass, mock_config_entry_lexicanum_only, async_add_entities
+        )
+
+        sensors = list(async_add_entities.call_args.args[0])
+        assert len(sensors) == len(SENSOR_DESCRIPTIONS)
+        assert all(
+            sensor.unique_id.startswith("test_lexicanum_entry_lexicanum_")
+            for sensor in sensors
+        )
+
+    def test_native_value(self, mock_config_entry: MagicMock) -> None:
+        """Test sensors report the counters of their source."""
+        cache = MagicMock()
+        cache.get_source_stats.return_value = SourceStats(
+            hits=4, misses=1, hit_time=0.002
+        )
+        values = {
+            description.key: Wh40kCacheSensor(
+                mock_config_entry,
+                cache,
+                SOURCE_WH40K_LEXICANUM,
+                "Lexicanum",
+                description,
+            ).native_value
+            for description in SENSOR_DESCRIPTIONS
+        }
+
+        cache.get_source_stats.assert_called_with(SOURCE_WH40K_LEXICANUM)
+        assert values["cache_hits"] == 4
+        assert values["cache_misses"] == 1
+        assert values["cache_hit_latency"] == 0.5
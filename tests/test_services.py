@@ -0,0 +1,162 @@
+"""Test the WH40k Tools for Assist services."""
+
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import voluptuous as vol
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.wh40k_tools_for_assist.const import (
+    DOMAIN,
+    SERVICE_EXPORT_CACHE,
+    SERVICE_IMPORT_CACHE,
+    SERVICE_INVALIDATE_CACHE,
+)
+from custom_components.wh40k_tools_for_assist.services import (
+    INVALIDATE_CACHE_SCHEMA,
+    async_import_startup_snapshot,
+    async_setup_services,
+    get_snapshot_path,
+)
+
+
+def _get_handler(mock_hass: MagicMock, service: str) -> AsyncMock:
+    """Return the handler registered for a service."""
+    for call in mock_hass.services.async_register.call_args_list:
+        if call.args[:2] == (DOMAIN, service):
+            return call.args[2]
+    msg = f"{service} not registered"
+    raise AssertionError(msg)
+
+
+class TestCacheServices:
+    """Test the cache administration services."""
+
+    async def test_export_defaults_to_startup_snapshot(
+        self, mock_hass: MagicMock
+    ) -> None:
+        """Test export writes the snapshot imported at startup by default."""
+        async_setup_services(mock_hass)
+
+        with patch(
+            "custom_components.wh40k_tools_for_assist.services.SQLiteCache"
+        ) as mock_cache:
+            mock_cache.return_value.async_export_snapshot = AsyncMock(return_value=3)
+            response = await _get_handler(mock_hass, SERVICE_EXPORT_CACHE)(
+                MagicMock(data={})
+            )
+
+        path = get_snapshot_path(mock_hass)
+        mock_cache.return_value.async_export_snapshot.assert_awaited_once_with(path)
+        assert response == {"path": str(path), "entries": 3}
+
+    async def test_import_requires_allowed_path(self, mock_hass: MagicMock) -> None:
+        """Test paths outside the allowlist are rejected."""
+        mock_hass.config.is_allowed_path.return_value = False
+        async_setup_services(mock_hass)
+
+        with pytest.raises(ServiceValidationError):
+            await _get_handler(mock_hass, SERVICE_IMPORT_CACHE)(
+                MagicMock(data={"path": "/etc/passwd"})
+            )
+        # Checked off the event loop, as it resolves the path on disk
+        mock_hass.async_add_executor_job.assert_awaited_once_with(
+            mock_hass.config.is_allowed_path, "/etc/passwd"
+        )
+
+    async def test_invalidate_faction(self, mock_hass: MagicMock) -> None:
+        """Test a faction purges its Wahapedia page by slug."""
+        async_setup_services(mock_hass)
+
+        with patch(
+            "custom_components.wh40k_tools_for_assist.services.SQLiteCache"
+        ) as mock_cache:
+            mock_cache.return_value.async_invalidate = AsyncMock(return_value=1)
+            response = await _get_handler(mock_hass, SERVICE_INVALIDATE_CACHE)(
+                MagicMock(data={"faction": "Space Marines"})
+            )
+
+        mock_cache.return_value.async_invalidate.assert_awaited_once_with(
+            "wahapedia", "space-marines"
+        )
+        assert response == {"deleted": 1}
+
+    async def test_invalidate_query(self, mock_hass: MagicMock) -> None:
+        """Test a query purges matching labels of each wiki in turn."""
+        async_setup_services(mock_hass)
+
+        with patch(
+            "custom_components.wh40k_tools_for_assist.services.SQLiteCache"
+        ) as mock_cache:
+            mock_cache.return_value.async_invalidate = AsyncMock(return_value=2)
+            response = await _get_handler(mock_hass, SERVICE_INVALIDATE_CACHE)(
+                MagicMock(data={"query": "Horus Heresy"})
+            )
+
+        assert [
+            call.args
+            for call in mock_cache.return_value.async_invalidate.await_args_list
+        ] == [("lexicanum",), ("fandom",)]
+        assert response == {"deleted": 4}
+
+    async def test_invalidate_unknown_faction(self, mock_hass: MagicMock) -> None:
+        """Test an unknown faction is rejected instead of purging nothing."""
+        async_setup_services(mock_hass)
+
+        with pytest.raises(ServiceValidationError):
+            await _get_handler(mock_hass, SERVICE_INVALIDATE_CACHE)(
+                MagicMock(data={"faction": "Squats"})
+            )
+
+    async def test_invalidate_faction_other_source(self, mock_hass: MagicMock) -> None:
+        """Test a faction with a source other than Wahapedia is rejected."""
+        async_setup_services(mock_hass)
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.services.SQLiteCache"
+            ) as mock_cache,
+            pytest.raises(ServiceValidationError),
+        ):
+            await _get_handler(mock_hass, SERVICE_INVALIDATE_CACHE)(
+                MagicMock(data={"faction": "Necrons", "source": "lexicanum"})
+            )
+        mock_cache.return_value.async_invalidate.assert_not_called()
+
+    async def test_invalidate_empty_query(self, mock_hass: MagicMock) -> None:
+        """Test a query without words is rejected instead of purging every wiki."""
+        async_setup_services(mock_hass)
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.services.SQLiteCache"
+            ) as mock_cache,
+            pytest.raises(ServiceValidationError),
+        ):
+            await _get_handler(mock_hass, SERVICE_INVALIDATE_CACHE)(
+                MagicMock(data={"query": "?!"})
+            )
+        mock_cache.return_value.async_invalidate.assert_not_called()
+
+    def test_invalidate_requires_filter(self) -> None:
+        """Test invalidate refuses to purge everything without a filter."""
+        with pytest.raises(vol.Invalid):
+            INVALIDATE_CACHE_SCHEMA({})
+        assert INVALIDATE_CACHE_SCHEMA({"query": "Horus"}) == {"query": "Horus"}
+
+    async def test_startup_import_skips_missing_snapshot(
+        self, mock_hass: MagicMock
+    ) -> None:
+        """Test nothing is imported when no snapshot has been provided."""
+        mock_hass.async_add_executor_job = AsyncMock(
+            side_effect=lambda func, *args: func(*args)
+        )
+
+        with patch(
+            "custom_components.wh40k_tools_for_assist.services.SQLiteCache"
+        ) as mock_cache:
+            await async_import_startup_snapshot(mock_hass)
+
+        assert not Path(get_snapshot_path(mock_hass)).exists()
+        mock_cache.return_value.async_import_snapshot.assert_not_called()
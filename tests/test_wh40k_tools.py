@@ -1,17 +1,25 @@
 """Test the WH40k search tools."""
 
+import asyncio
+from collections.abc import Callable
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from custom_components.wh40k_tools_for_assist.const import DOMAIN
+from custom_components.wh40k_tools_for_assist.const import (
+    CONF_RESPONSE_DEADLINE,
+    DOMAIN,
+    WAHAPEDIA_RULES_URLS,
+)
+from custom_components.wh40k_tools_for_assist.errors import FetchError
 from custom_components.wh40k_tools_for_assist.wh40k_fandom import SearchWh40kFandomTool
 from custom_components.wh40k_tools_for_assist.wh40k_lexicanum import (
     SearchWh40kLexicanumTool,
 )
 from custom_components.wh40k_tools_for_assist.wh40k_wahapedia import (
     SearchWh40kWahapediaTool,
+    async_fetch_page,
     extract_sections_from_html,
     normalize_faction_name,
     search_sections,
@@ -65,6 +73,52 @@ class TestExtractSectionsFromHtml:
         assert sections == []
 
 
+class TestFetchPage:
+    """Test conditional Wahapedia page downloads."""
+
+    async def test_stores_validators(
+        self,
+        mock_hass: MagicMock,
+        mock_response: Callable[..., MagicMock],
+        wahapedia_html_content: str,
+    ) -> None:
+        """Test the validators of a downloaded page are kept with its sections."""
+        session = MagicMock()
+        session.get.return_value = mock_response(
+            200,
+            text=wahapedia_html_content,
+            headers={"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+        )
+
+        page = await async_fetch_page(mock_hass, session, "https://test.com")
+
+        assert session.get.call_args.kwargs["headers"] is None
+        assert len(page["sections"]) == 2
+        mock_hass.async_add_executor_job.assert_awaited_once()
+        assert page["etag"] == '"v1"'
+        assert page["last_modified"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+
+    async def test_not_modified_returns_cached(
+        self, mock_hass: MagicMock, mock_response: Callable[..., MagicMock]
+    ) -> None:
+        """Test an unchanged page is not downloaded or parsed again."""
+        session = MagicMock()
+        session.get.return_value = mock_response(304)
+        cached = {"sections": [], "etag": '"v1"', "last_modified": None}
+
+        with patch(
+            "custom_components.wh40k_tools_for_assist.wh40k_wahapedia"
+            ".extract_sections_from_html"
+        ) as mock_extract:
+            page = await async_fetch_page(
+                mock_hass, session, "https://test.com", cached
+            )
+
+        assert page is cached
+        assert session.get.call_args.kwargs["headers"] == {"If-None-Match": '"v1"'}
+        mock_extract.assert_not_called()
+
+
 class TestSearchSections:
     """Test section search functionality."""
 
@@ -124,15 +178,22 @@ class TestSearchWh40kLexicanumTool:
 
         with (
             patch(
-                "custom_components.wh40k_tools_for_assist.wh40k_lexicanum.async_get_clientsession"
+                "custom_components.wh40k_tools_for_assist.mediawiki.async_get_clientsession"
             ) as mock_session,
             patch(
-                "custom_components.wh40k_tools_for_assist.wh40k_lexicanum.SQLiteCache"
+                "custom_components.wh40k_tools_for_assist.mediawiki.SQLiteCache"
             ) as mock_cache,
         ):
             # Mock cache miss
+            async def _get_or_fetch(*args: Any, **_kwargs: Any) -> Any:
+                return await args[3]()
+
             mock_cache_instance = MagicMock()
-            mock_cache_instance.get.return_value = None
+            mock_cache_instance.async_get_or_fetch = AsyncMock(
+                side_effect=_get_or_fetch
+            )
+            mock_cache_instance.async_get = AsyncMock(return_value=None)
+            mock_cache_instance.async_set = AsyncMock()
             mock_cache.return_value = mock_cache_instance
 
             # Mock HTTP response
@@ -149,7 +210,7 @@ class TestSearchWh40kLexicanumTool:
 
             result = await lexicanum_tool.async_call(mock_hass, tool_input, llm_context)
 
-            assert "results" in result or "result" in result
+            assert [r["title"] for r in result["results"]] == ["Space Marines"]
 
 
 class TestSearchWh40kFandomTool:
@@ -181,3 +242,196 @@ class TestSearchWh40kWahapediaTool:
         assert "Wahapedia" in wahapedia_tool.description
         assert "query" in wahapedia_tool.parameters.schema
         assert "faction" in wahapedia_tool.parameters.schema
+
+    async def test_batch_searches_pages_once(
+        self,
+        wahapedia_tool: SearchWh40kWahapediaTool,
+        mock_hass: MagicMock,
+        mock_config_entry: MagicMock,
+        wahapedia_html_content: str,
+    ) -> None:
+        """Test every query of a batch is answered from one fetch of the pages."""
+        mock_hass.data[DOMAIN] = {"config": {}}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        tool_input = MagicMock()
+        tool_input.tool_args = {
+            "query": "shooting",
+            "queries": ["psychic"],
+            "faction": "Space Marines",
+        }
+        page = {"sections": extract_sections_from_html(wahapedia_html_content, "url")}
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.async_get_clientsession"
+            ),
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.SQLiteCache"
+            ) as mock_cache,
+        ):
+            mock_cache.return_value.async_get_or_fetch = AsyncMock(return_value=page)
+
+            result = await wahapedia_tool.async_call(mock_hass, tool_input, MagicMock())
+
+        mock_cache.return_value.async_get_or_fetch.assert_awaited_once()
+        assert list(result["results"]) == ["shooting", "psychic"]
+        assert result["results"]["shooting"]["results"][0]["title"] == "Shooting Phase"
+        assert result["results"]["psychic"] == {
+            "result": "No matches found for 'psychic' in Space Marines"
+        }
+
+    async def test_unavailable_pages_return_error(
+        self,
+        wahapedia_tool: SearchWh40kWahapediaTool,
+        mock_hass: MagicMock,
+        mock_config_entry: MagicMock,
+    ) -> None:
+        """Test pages failing to load are reported as an error, not as empty."""
+        mock_hass.data[DOMAIN] = {"config": {}}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        tool_input = MagicMock()
+        tool_input.tool_args = {"query": "shooting"}
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.async_get_clientsession"
+            ),
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.SQLiteCache"
+            ) as mock_cache,
+        ):
+            mock_cache.return_value.async_get_or_fetch = AsyncMock(
+                side_effect=FetchError(
+                    "wahapedia is unavailable, retrying in 60 seconds"
+                )
+            )
+
+            result = await wahapedia_tool.async_call(mock_hass, tool_input, MagicMock())
+
+        assert result == {"error": "wahapedia is unavailable, retrying in 60 seconds"}
+
+    @pytest.mark.parametrize(
+        ("slow_urls", "expected"),
+        [
+            (
+                {WAHAPEDIA_RULES_URLS["core-rules"]},
+                {"results": [{"title": "Shooting Phase"}], "partial": True},
+            ),
+            (
+                set(WAHAPEDIA_RULES_URLS.values()),
+                {"error": "Wahapedia did not respond in time"},
+            ),
+        ],
+    )
+    async def test_pages_missing_deadline(
+        self,
+        wahapedia_tool: SearchWh40kWahapediaTool,
+        mock_hass: MagicMock,
+        mock_config_entry: MagicMock,
+        wahapedia_html_content: str,
+        slow_urls: set[str],
+        expected: dict[str, Any],
+    ) -> None:
+        """Test pages missing the deadline are skipped and reported."""
+        mock_hass.data[DOMAIN] = {"config": {CONF_RESPONSE_DEADLINE: 0.05}}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        tool_input = MagicMock()
+        tool_input.tool_args = {"query": "shooting"}
+        page = {"sections": extract_sections_from_html(wahapedia_html_content, "url")}
+
+        async def _get_or_fetch(*args: Any, deadline: float, **_kwargs: Any) -> dict:
+            if args[2]["url"] in slow_urls:
+                async with asyncio.timeout_at(deadline):
+                    await asyncio.Event().wait()
+            return page
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.async_get_clientsession"
+            ),
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.SQLiteCache"
+            ) as mock_cache,
+        ):
+            mock_cache.return_value.async_get_or_fetch = _get_or_fetch
+
+            result = await wahapedia_tool.async_call(mock_hass, tool_input, MagicMock())
+
+        if "results" in result:
+            result["results"] = [
+                {"title": section["title"]} for section in result["results"]
+            ]
+        assert result == expected
+
+    async def test_failed_pages_reported_with_results(
+        self,
+        wahapedia_tool: SearchWh40kWahapediaTool,
+        mock_hass: MagicMock,
+        mock_config_entry: MagicMock,
+        wahapedia_html_content: str,
+    ) -> None:
+        """Test pages failing next to loaded ones mark every answer partial."""
+        mock_hass.data[DOMAIN] = {"config": {}}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        tool_input = MagicMock()
+        tool_input.tool_args = {"query": "shooting", "queries": ["psychic"]}
+        page = {"sections": extract_sections_from_html(wahapedia_html_content, "url")}
+
+        async def _get_or_fetch(*args: Any, **_kwargs: Any) -> dict:
+            if args[2]["url"] != WAHAPEDIA_RULES_URLS["core-rules"]:
+                msg = "Wahapedia returned HTTP 503"
+                raise FetchError(msg)
+            return page
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.async_get_clientsession"
+            ),
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.SQLiteCache"
+            ) as mock_cache,
+        ):
+            mock_cache.return_value.async_get_or_fetch = _get_or_fetch
+
+            result = await wahapedia_tool.async_call(mock_hass, tool_input, MagicMock())
+
+        shooting = result["results"]["shooting"]
+        assert shooting["results"][0]["title"] == "Shooting Phase"
+        assert shooting["partial"] is True
+        assert result["results"]["psychic"] == {
+            "result": "No matches found for 'psychic' in core rules",
+            "errors": ["Wahapedia returned HTTP 503"],
+            "partial": True,
+        }
+
+    async def test_stale_pages_marked_partial(
+        self,
+        wahapedia_tool: SearchWh40kWahapediaTool,
+        mock_hass: MagicMock,
+        mock_config_entry: MagicMock,
+        wahapedia_html_content: str,
+    ) -> None:
+        """Test stale pages served at the deadline mark the response partial."""
+        mock_hass.data[DOMAIN] = {"config": {}}
+        mock_hass.config_entries.async_entries.return_value = [mock_config_entry]
+        tool_input = MagicMock()
+        tool_input.tool_args = {"query": "shooting"}
+        page = {
+            "sections": extract_sections_from_html(wahapedia_html_content, "url"),
+            "partial": True,
+        }
+
+        with (
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.async_get_clientsession"
+            ),
+            patch(
+                "custom_components.wh40k_tools_for_assist.wh40k_wahapedia.SQLiteCache"
+            ) as mock_cache,
+        ):
+            mock_cache.return_value.async_get_or_fetch = AsyncMock(return_value=page)
+
+            result = await wahapedia_tool.async_call(mock_hass, tool_input, MagicMock())
+
+        assert result["results"][0]["title"] == "Shooting Phase"
+        assert result["partial"] is True